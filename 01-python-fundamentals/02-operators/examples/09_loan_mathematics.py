@@ -0,0 +1,259 @@
+# ============================================================================
+# FILENAME: 09_loan_mathematics.py
+# DESCRIPTION: Demonstrates loan mathematics with closed-form payments,
+#              integer-cent amortization schedules and fast parameter sweeps
+# ============================================================================
+
+"""
+check_loan_eligibility in 06_nested_conditionals.py approximates the
+monthly payment as loan_amount / (5 * 12), which ignores interest. The
+compound interest example in 01_arithmetic_operators.py works out one
+scenario at a time with floats.
+
+This module covers the arithmetic properly:
+- The annuity formula gives the exact monthly payment in one expression:
+      payment = P * r / (1 - (1 + r) ** -n)
+  with P the principal, r the monthly rate and n the number of payments
+- Amortization schedules use integer cents and rates in millionths
+  (6.125% = 61,250), so every step is exact integer arithmetic. Basis
+  points (0.01%) would be too coarse for eighth-point rates. Floats
+  accumulate tiny errors month after month ("drift"); integers do not
+- Schedules come either lazily (a generator, one row at a time) or as
+  preallocated arrays for when every row is needed
+- sweep() prices a grid of rates x terms x principals. The payment is the
+  principal times a factor that depends only on rate and term, so the
+  factor is computed once per (rate, term) and applied to all principals
+  with map(); a process pool can split the grid by rate
+"""
+
+from array import array
+from collections import namedtuple
+from itertools import product, repeat
+from operator import mul, sub
+
+# ----------------------------------------------------------------------------
+# 1. Closed-Form Formulas
+# ----------------------------------------------------------------------------
+
+def annuity_factor(annual_rate, months):
+    """Payment per unit of principal: r / (1 - (1 + r) ** -n).
+
+    Args:
+        annual_rate (float): Yearly rate as a fraction (0.065 for 6.5%)
+        months (int): Number of monthly payments
+
+    Returns:
+        float: The factor; multiply by the principal to get the payment
+    """
+    if months <= 0:
+        raise ValueError("months must be positive")
+    rate = annual_rate / 12
+    if rate == 0:
+        return 1 / months
+    return rate / (1 - (1 + rate) ** -months)
+
+def monthly_payment(principal, annual_rate, months):
+    """Monthly payment for a fully amortizing loan, in the input's units."""
+    return principal * annuity_factor(annual_rate, months)
+
+def compound_amount(principal, annual_rate, years, periods_per_year=12):
+    """Future value A = P(1 + r/n)^(nt), as in 01_arithmetic_operators.py."""
+    return principal * (1 + annual_rate / periods_per_year) ** (periods_per_year * years)
+
+def debt_to_income(loan_amount, annual_income, annual_rate, years=5):
+    """Debt-to-income ratio using the real payment instead of loan / months."""
+    return monthly_payment(loan_amount, annual_rate, years * 12) / (annual_income / 12)
+
+# ----------------------------------------------------------------------------
+# 2. Integer-Cent Amortization
+# ----------------------------------------------------------------------------
+
+Installment = namedtuple("Installment", ["month", "payment", "interest", "principal", "balance"])
+
+RATE_UNITS = 1_000_000                 # rates are stored in millionths
+RATE_UNITS_PER_YEAR = RATE_UNITS * 12  # monthly interest = balance * rate / this
+
+def to_rate_units(annual_rate):
+    """0.06125 -> 61_250. Rates are stored as integers from here on.
+
+    Raises:
+        ValueError: If the rate is not a whole number of millionths, rather
+            than silently rounding it
+    """
+    scaled = annual_rate * RATE_UNITS
+    units = round(scaled)
+    if abs(scaled - units) > 1e-6:  # allow float noise like 61250.000000000004
+        raise ValueError(f"rate {annual_rate} is not a whole number of millionths")
+    return units
+
+def payment_cents(principal_cents, rate_units, months):
+    """The monthly payment in whole cents (rounded to the nearest cent)."""
+    return round(principal_cents * annuity_factor(rate_units / RATE_UNITS, months))
+
+def _interest_cents(balance, rate_units):
+    """Interest for one month, rounded half up, using integers only."""
+    return (balance * rate_units + RATE_UNITS_PER_YEAR // 2) // RATE_UNITS_PER_YEAR
+
+def amortization_schedule(principal_cents, rate_units, months):
+    """Yield one Installment per month, lazily.
+
+    Every amount is in integer cents. The last payment is adjusted so the
+    balance ends at exactly zero.
+
+    Args:
+        principal_cents (int): Amount borrowed, in cents
+        rate_units (int): Annual rate in millionths (65_000 = 6.5%)
+        months (int): Number of payments
+
+    Yields:
+        Installment: month, payment, interest, principal, balance (cents)
+    """
+    payment = payment_cents(principal_cents, rate_units, months)
+    balance = principal_cents
+    for month in range(1, months + 1):
+        interest = _interest_cents(balance, rate_units)
+        if month == months or payment - interest > balance:
+            payment = balance + interest
+        paid = payment - interest
+        balance -= paid
+        yield Installment(month, payment, interest, paid, balance)
+        if balance == 0:
+            return
+
+ScheduleArrays = namedtuple("ScheduleArrays", ["payment", "interest", "principal", "balance"])
+
+def amortization_arrays(principal_cents, rate_units, months):
+    """The whole schedule as four preallocated array('q') columns.
+
+    Allocating the arrays once up front avoids growing lists row by row and
+    stores each amount in 8 bytes instead of a Python int object.
+
+    Returns:
+        ScheduleArrays: Columns indexed by month - 1
+    """
+    columns = ScheduleArrays(*(array("q", bytes(8 * months)) for _ in range(4)))
+    payments, interests, principals, balances = columns
+    count = 0
+    for count, row in enumerate(amortization_schedule(principal_cents, rate_units, months), 1):
+        index = count - 1
+        payments[index] = row.payment
+        interests[index] = row.interest
+        principals[index] = row.principal
+        balances[index] = row.balance
+    if count < months:  # paid off early; trim the unused rows
+        columns = ScheduleArrays(*(column[:count] for column in columns))
+    return columns
+
+# ----------------------------------------------------------------------------
+# 3. Parameter Sweeps
+# ----------------------------------------------------------------------------
+
+SweepResult = namedtuple("SweepResult", ["rates", "terms", "principals", "payments", "total_interest"])
+
+def _sweep_rates(rates, terms, principals):
+    """Payments and total interest (cents) for every (rate, term, principal)."""
+    payments = array("q")
+    total_interest = array("q")
+    for rate, months in product(rates, terms):
+        factor = annuity_factor(rate, months)
+        # round() each payment to whole cents, all in C via map()
+        row = array("q", map(round, map(mul, principals, repeat(factor))))
+        payments.extend(row)
+        total_interest.extend(map(sub, map(mul, row, repeat(months)), principals))
+    return payments, total_interest
+
+def _sweep_worker(args):
+    return _sweep_rates(*args)
+
+def sweep(rates, terms, principals_cents, processes=None, chunk_rates=8):
+    """Evaluate every combination of rate, term and principal.
+
+    Results are ordered rate-major: index = (i_rate * len(terms) + i_term)
+    * len(principals) + i_principal. Total interest uses the rounded
+    payment times the number of months, minus the principal.
+
+    Args:
+        rates (sequence): Annual rates as fractions
+        terms (sequence): Terms in months
+        principals_cents (sequence): Principals in cents
+        processes (int, optional): Worker processes; None runs in-process
+        chunk_rates (int, optional): Rates per work item for the pool
+
+    Returns:
+        SweepResult: The grid axes plus payments and total_interest arrays
+    """
+    principals = array("q", principals_cents)
+    payments = array("q")
+    total_interest = array("q")
+    if processes:
+        from multiprocessing import Pool
+        chunks = [(rates[i:i + chunk_rates], terms, principals)
+                  for i in range(0, len(rates), chunk_rates)]
+        with Pool(processes) as pool:
+            for chunk_payments, chunk_interest in pool.imap(_sweep_worker, chunks):
+                payments.extend(chunk_payments)
+                total_interest.extend(chunk_interest)
+    else:
+        payments, total_interest = _sweep_rates(rates, terms, principals)
+    return SweepResult(list(rates), list(terms), principals, payments, total_interest)
+
+# ----------------------------------------------------------------------------
+# 4. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import time
+
+    loan, rate, years = 250_000, 0.065, 30
+    print(f"Payment on ${loan:,} at {rate:.1%} for {years} years: "
+          f"${monthly_payment(loan, rate, years * 12):,.2f}")
+    print(f"Rough payment (loan / months): ${loan / (years * 12):,.2f}")
+    print(f"DTI on $85,000 income, 5 years at 6.5%: {debt_to_income(loan, 85_000, rate):.2f} "
+          f"(rough: {(loan / 60) / (85_000 / 12):.2f})")
+
+    schedule = list(amortization_schedule(loan * 100, to_rate_units(rate), years * 12))
+    for row in schedule[:2] + schedule[-2:]:
+        print(f"  month {row.month:3}: pay ${row.payment / 100:,.2f}, "
+              f"interest ${row.interest / 100:,.2f}, balance ${row.balance / 100:,.2f}")
+    total_paid = sum(row.payment for row in schedule)
+    print(f"Total paid: ${total_paid / 100:,.2f}, principal repaid exactly: "
+          f"{sum(row.principal for row in schedule) == loan * 100}")
+
+    # The same schedule in floats: the balance drifts away from zero
+    balance = float(loan)
+    payment = monthly_payment(loan, rate, years * 12)
+    for _ in range(years * 12):
+        balance -= payment - balance * rate / 12
+    print(f"Float schedule leaves a balance of {balance:.10f} dollars")
+
+    columns = amortization_arrays(loan * 100, to_rate_units(rate), years * 12)
+    print(f"Array schedule matches the generator: "
+          f"{list(columns.balance) == [row.balance for row in schedule]}")
+    eighth = list(amortization_schedule(loan * 100, to_rate_units(0.06125), years * 12))
+    print(f"At 6.125% (an eighth-point rate): first interest ${eighth[0].interest / 100:,.2f}, "
+          f"{len(eighth)} payments")
+
+    # 100 rates x 10 terms x 1,000 principals = 1,000,000 scenarios
+    rates = [0.02 + i * 0.0005 for i in range(100)]
+    terms = [12 * y for y in (1, 2, 3, 5, 7, 10, 15, 20, 25, 30)]
+    principals = range(1_000_000, 101_000_000, 100_000)  # $10k to $1M, in cents
+    start = time.perf_counter()
+    result = sweep(rates, terms, principals)
+    elapsed = time.perf_counter() - start
+    print(f"\nSweep of {len(result.payments):,} scenarios: {elapsed:.2f}s")
+    start = time.perf_counter()
+    parallel = sweep(rates, terms, principals, processes=2)
+    print(f"Same sweep on 2 processes: {time.perf_counter() - start:.2f}s, "
+          f"identical: {parallel.payments == result.payments}")
+    index = (rates.index(0.065) * len(terms) + terms.index(360)) * len(principals) + 240
+    print(f"Check: 6.5%, 360 months, ${principals[240] / 100:,.0f} -> "
+          f"${result.payments[index] / 100:,.2f}/month")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - The annuity formula gives a loan payment in one expression
+# - Keep money in integer cents and rates in millionths to avoid drift
+# - Generators produce long schedules lazily; arrays store them compactly
+# - Factor out what depends only on rate and term, then map() it over principals
+# - A process pool can split a large grid into independent chunks
+# ============================================================================
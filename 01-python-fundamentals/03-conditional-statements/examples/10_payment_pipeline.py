@@ -0,0 +1,362 @@
+# ============================================================================
+# FILENAME: 10_payment_pipeline.py
+# DESCRIPTION: Demonstrates replacing an if/elif payment chain with a registry
+#              of concurrent, micro-batching payment processors (asyncio)
+# ============================================================================
+
+"""
+process_payment in 08_common_patterns.py picks a payment method with an
+if/elif chain and handles one payment at a time. process_payment in
+02_if_only.py checks one balance at a time with guard clauses.
+
+Real payment gateways are slow (tens or hundreds of milliseconds per call),
+so handling payments one after another wastes almost all of the time
+waiting. This module shows how to structure a payment pipeline instead:
+- A registry (a dict) maps each payment method to its processor in O(1)
+- Each processor sends charges to its gateway concurrently with asyncio,
+  limited by a per-processor semaphore so one gateway is never flooded
+- Charges that arrive close together are grouped into one gateway call
+  ("micro-batching"), which many gateways support and which saves a
+  network round trip per charge
+- Every charge carries an idempotency key; submitting the same key twice
+  returns the first result instead of charging the customer twice. Only
+  final outcomes are kept: after a gateway error the key can be retried.
+  Reusing a key for a different method or amount is rejected
+- StubGateway simulates latency so throughput and p99 latency can be
+  measured offline, without a real payment provider
+"""
+
+import asyncio
+import random
+import time
+from collections import OrderedDict, namedtuple
+
+# ----------------------------------------------------------------------------
+# 1. Charges, Results and a Stub Gateway
+# ----------------------------------------------------------------------------
+
+Charge = namedtuple("Charge", ["idempotency_key", "method", "amount"])
+# retryable is True for transient failures (gateway errors), where nothing was charged
+PaymentResult = namedtuple("PaymentResult", ["idempotency_key", "success", "message", "retryable"],
+                           defaults=(False,))
+
+class StubGateway:
+    """A fake payment gateway with configurable latency.
+
+    Attributes:
+        name (str): Display name used in result messages
+        latency (float): Seconds per gateway call
+        jitter (float): Extra random latency, up to this many seconds
+        failure_rate (float): Fraction of charges that are declined
+        calls (int): Number of gateway calls made (one per batch)
+    """
+
+    def __init__(self, name, latency=0.05, jitter=0.01, failure_rate=0.0, seed=None):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    async def charge_batch(self, charges):
+        """Charge several payments in one simulated network round trip."""
+        self.calls += 1
+        await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+        results = []
+        for charge in charges:
+            if self._random.random() < self.failure_rate:
+                results.append(PaymentResult(charge.idempotency_key, False,
+                                             f"Declined ${charge.amount:.2f} by {self.name}"))
+            else:
+                results.append(PaymentResult(charge.idempotency_key, True,
+                                             f"Processed ${charge.amount:.2f} with {self.name}"))
+        return results
+
+# ----------------------------------------------------------------------------
+# 2. A Micro-Batching Processor
+# ----------------------------------------------------------------------------
+
+class PaymentProcessor:
+    """Sends charges for one payment method to its gateway.
+
+    Charges are queued. A background task takes up to `max_batch` charges
+    (waiting at most `max_wait` seconds for more to arrive) and sends them
+    as one gateway call. At most `concurrency` gateway calls run at once.
+    """
+
+    def __init__(self, gateway, concurrency=10, max_batch=50, max_wait=0.002):
+        self.gateway = gateway
+        self.concurrency = concurrency
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = None
+        self._semaphore = None
+        self._batcher = None
+        self._collecting = []  # charges taken from the queue for the next batch
+        self._in_flight = set()
+
+    def _ensure_started(self):
+        """Create the queue and batching task on the running event loop."""
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._batcher = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, charge):
+        """Queue a charge and wait for its result."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((charge, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Take a gateway slot first: while all slots are busy, charges
+            # pile up in the queue and the next batch comes out fuller
+            await self._semaphore.acquire()
+            batch = self._collecting = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # close() sends whatever is left in self._collecting
+                self._semaphore.release()
+                raise
+            self._collecting = []
+            self._start_send(batch)
+
+    def _start_send(self, batch):
+        """Send a batch in the background; the caller holds a semaphore slot."""
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, batch):
+        try:
+            results = await self.gateway.charge_batch([charge for charge, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            if len(results) != len(batch):
+                error = RuntimeError(f"{self.gateway.name} returned {len(results)} results "
+                                     f"for {len(batch)} charges")
+                for _, future in batch[len(results):]:
+                    if not future.done():
+                        future.set_exception(error)
+        except Exception as error:  # a gateway failure fails the whole batch
+            for charge, future in batch:
+                if not future.done():
+                    future.set_result(PaymentResult(charge.idempotency_key, False,
+                                                    f"Gateway error: {error}", retryable=True))
+        finally:
+            self._semaphore.release()
+
+    async def close(self):
+        """Stop the batching task, send every queued charge, and wait for them."""
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+            pending, self._collecting = self._collecting, []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            for start in range(0, len(pending), self.max_batch):
+                await self._semaphore.acquire()
+                self._start_send(pending[start:start + self.max_batch])
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight)
+
+# ----------------------------------------------------------------------------
+# 3. The Payment Service (Registry + Idempotency)
+# ----------------------------------------------------------------------------
+
+class PaymentService:
+    """Routes charges to registered processors by payment method.
+
+    Attributes:
+        processors (dict): Payment method -> PaymentProcessor
+    """
+
+    def __init__(self, idempotency_capacity=100_000):
+        self.processors = {}
+        # idempotency key -> (Charge, Future of result). Payments still in
+        # flight are never evicted, or a retry could charge a second time;
+        # only finished ones go to the bounded LRU of final outcomes
+        self._pending = {}
+        self._results = OrderedDict()
+        self._capacity = idempotency_capacity
+
+    def register(self, method, processor):
+        """Register (or replace) the processor for a payment method."""
+        self.processors[method] = processor
+
+    async def process_payment(self, payment_method, amount, idempotency_key):
+        """Process one payment.
+
+        Args:
+            payment_method (str): Registered method, e.g. "credit_card"
+            amount (float): Amount to charge
+            idempotency_key (str): Unique key for this payment attempt
+
+        Returns:
+            PaymentResult: The outcome (the same one for a repeated key). A
+                key reused for a different method or amount is rejected
+        """
+        # A repeated key waits for, or returns, the first attempt's result
+        existing = self._pending.get(idempotency_key) or self._results.get(idempotency_key)
+        if existing is not None:
+            charge, future = existing
+            if charge.method != payment_method or charge.amount != amount:
+                return PaymentResult(idempotency_key, False,
+                                     "Idempotency key already used for a different payment")
+            return await future
+
+        # Guard clauses, as in 02_if_only.py, before anything is queued
+        processor = self.processors.get(payment_method)
+        if processor is None:
+            return PaymentResult(idempotency_key, False,
+                                 f"Cannot process ${amount:.2f}: unsupported payment method '{payment_method}'")
+        if amount <= 0:
+            return PaymentResult(idempotency_key, False, "Payment amount must be positive")
+
+        charge = Charge(idempotency_key, payment_method, amount)
+        future = asyncio.ensure_future(processor.submit(charge))
+        self._pending[idempotency_key] = (charge, future)
+        future.add_done_callback(lambda done: self._settle(charge, done))
+        return await future
+
+    def _settle(self, charge, future):
+        """Move a finished payment out of the pending table.
+
+        Declines and successes are final and are cached, evicting the
+        oldest finished keys beyond the capacity. Gateway errors,
+        exceptions and cancellations charged nothing, so they are dropped
+        and a retry with the same key is sent again.
+        """
+        key = charge.idempotency_key
+        del self._pending[key]
+        if (future.cancelled() or future.exception() is not None
+                or future.result().retryable):
+            return
+        self._results[key] = (charge, future)
+        if len(self._results) > self._capacity:
+            self._results.popitem(last=False)  # forget the oldest finished key
+
+    async def close(self):
+        await asyncio.gather(*(p.close() for p in self.processors.values()))
+
+# ----------------------------------------------------------------------------
+# 4. Load Test
+# ----------------------------------------------------------------------------
+
+async def load_test(service, payments, max_outstanding=5_000):
+    """Run many payments concurrently and measure latency.
+
+    Args:
+        service (PaymentService): The service under test
+        payments (list): (method, amount, key) tuples
+        max_outstanding (int, optional): Payments in flight at once
+
+    Returns:
+        dict: throughput (payments/s), p50 and p99 latency (ms), successes
+    """
+    limit = asyncio.Semaphore(max_outstanding)
+    latencies = []
+
+    async def one(method, amount, key):
+        async with limit:
+            start = time.perf_counter()
+            result = await service.process_payment(method, amount, key)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(*payment) for payment in payments))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput": len(payments) / elapsed,
+        "p50_ms": 1000 * latencies[len(latencies) // 2],
+        "p99_ms": 1000 * latencies[int(len(latencies) * 0.99)],
+        "successes": sum(result.success for result in results),
+    }
+
+# ----------------------------------------------------------------------------
+# 5. Demonstration
+# ----------------------------------------------------------------------------
+
+async def main():
+    service = PaymentService()
+    service.register("credit_card", PaymentProcessor(StubGateway("credit card", seed=1)))
+    service.register("paypal", PaymentProcessor(StubGateway("PayPal", latency=0.08, seed=2),
+                                                concurrency=5, max_batch=100))
+    service.register("store_credit", PaymentProcessor(StubGateway("store credit", latency=0.005, seed=3)))
+    service.register("gift_card", PaymentProcessor(StubGateway("gift card", latency=0.01, seed=4)))
+
+    print((await service.process_payment("credit_card", 99.95, "order-1")).message)
+    # Processed $99.95 with credit card
+    print((await service.process_payment("paypal", 59.99, "order-2")).message)
+    # Processed $59.99 with PayPal
+    print((await service.process_payment("bitcoin", 199.99, "order-3")).message)
+    # Cannot process $199.99: unsupported payment method 'bitcoin'
+
+    # The same idempotency key twice charges only once
+    gateway = service.processors["credit_card"].gateway
+    calls_before = gateway.calls
+    first, second = await asyncio.gather(
+        service.process_payment("credit_card", 10.00, "order-4"),
+        service.process_payment("credit_card", 10.00, "order-4"))
+    print(f"Duplicate submit -> same result: {first is second}, "
+          f"gateway calls: {gateway.calls - calls_before}")
+    print((await service.process_payment("credit_card", 25.00, "order-4")).message)
+    # Idempotency key already used for a different payment
+
+    # A gateway error is not cached: retrying the same key charges again
+    class FlakyGateway(StubGateway):
+        async def charge_batch(self, charges):
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError("connection reset")
+            return await super().charge_batch(charges)
+
+    service.register("voucher", PaymentProcessor(FlakyGateway("voucher", latency=0.001)))
+    print((await service.process_payment("voucher", 5.00, "order-5")).message)
+    # Gateway error: connection reset
+    print((await service.process_payment("voucher", 5.00, "order-5")).message)
+    # Processed $5.00 with voucher
+
+    methods = list(service.processors)
+    payments = [(random.choice(methods), round(random.uniform(1, 500), 2), f"load-{i}")
+                for i in range(20_000)]
+    stats = await load_test(service, payments)
+    print(f"\n20,000 payments: {stats['throughput']:,.0f}/s, "
+          f"p50 {stats['p50_ms']:.0f} ms, p99 {stats['p99_ms']:.0f} ms")
+    calls = sum(p.gateway.calls for p in service.processors.values())
+    print(f"Gateway calls: {calls:,} (micro-batching)")
+    await service.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - A dict registry replaces an if/elif chain with an O(1) lookup
+# - asyncio lets one thread wait on many slow gateway calls at once
+# - A semaphore caps concurrent calls per gateway
+# - Micro-batching groups nearby charges into one round trip
+# - Idempotency keys make retries safe: the same key never charges twice
+# - A stub gateway with fake latency allows offline load testing
+# ============================================================================
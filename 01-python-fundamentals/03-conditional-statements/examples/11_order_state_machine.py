@@ -0,0 +1,384 @@
+# ============================================================================
+# FILENAME: 11_order_state_machine.py
+# DESCRIPTION: Demonstrates a table-driven state machine that processes
+#              millions of orders, with a replayable append-only event log
+# ============================================================================
+
+"""
+process_order in 08_common_patterns.py walks an if/elif ladder on
+order["status"] and appends a note to order["notes"] on every step. That
+works for one order, but:
+- every call re-tests the states one by one until one matches
+- each order is a dict (hundreds of bytes) and its notes list grows forever
+
+This module turns the same state machine into data:
+- Transitions are declared per edge: (from state, guard, to state, note,
+  optional action)
+- Because every guard depends only on a few boolean flags, the machine is
+  "compiled" into a lookup table indexed by (state, flags). Processing an
+  order is then a single list index, no matter how many states exist
+- Orders live in an OrderStore: one byte for the state and one byte of
+  flag bits per order, in compact arrays
+- Notes are no longer kept per order. Every step is written to an
+  append-only binary event log on disk, and only the most recent notes are
+  kept in memory in a bounded ring buffer (a deque with maxlen)
+- Order ids go to a companion id file as orders are created, so the log
+  and id file alone rebuild every order's state after a crash
+"""
+
+import struct
+from array import array
+from collections import deque
+
+# ----------------------------------------------------------------------------
+# 1. States, Flags and Notes
+# ----------------------------------------------------------------------------
+
+STATES = ("new", "payment_pending", "preparing", "shipping", "completed", "cancelled")
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+
+# Each flag is one bit of the order's flag byte
+PAYMENT_RECEIVED = 0b01
+DELIVERED = 0b10
+FLAG_BITS = 2
+FLAG_COMBINATIONS = 1 << FLAG_BITS
+
+NO_TRANSITION = 255  # table value meaning "stay in this state"
+
+# ----------------------------------------------------------------------------
+# 2. Declaring and Compiling the Machine
+# ----------------------------------------------------------------------------
+
+class StateMachine:
+    """Transitions declared per edge, compiled into a flat lookup table.
+
+    Guards receive the order's flag byte and must depend only on it, which
+    is what makes compiling the table possible.
+    """
+
+    def __init__(self, states):
+        self.states = tuple(states)
+        self.codes = {name: code for code, name in enumerate(self.states)}
+        self.notes = []           # note code -> text
+        self._note_codes = {}
+        self._edges = {code: [] for code in range(len(self.states))}
+        self._idle_notes = {}     # state -> note when no transition fires
+        self.table = None
+        self.actions = None       # parallel to table: action of the edge that fires
+
+    def _note_code(self, text):
+        if text not in self._note_codes:
+            self._note_codes[text] = len(self.notes)
+            self.notes.append(text)
+        return self._note_codes[text]
+
+    def add_transition(self, source, target, note, guard=None, action=None):
+        """Declare an edge. Edges are tried in the order they are added.
+
+        Args:
+            source (str): State the order must be in
+            target (str): State to move to
+            note (str): Note recorded when the transition fires
+            guard (callable, optional): guard(flags) -> bool
+            action (callable, optional): action(store, index) run after
+                this edge fires. Actions belong to the edge, so two edges
+                between the same states can have different actions
+        """
+        edge = (guard or (lambda flags: True), self.codes[target], self._note_code(note), action)
+        self._edges[self.codes[source]].append(edge)
+
+    def set_idle_note(self, state, note):
+        """Note recorded when an order in `state` cannot move on."""
+        self._idle_notes[self.codes[state]] = self._note_code(note)
+
+    def compile(self):
+        """Evaluate every guard for every flag combination, once.
+
+        table[state << FLAG_BITS | flags] packs (target << 8 | note); a
+        target of NO_TRANSITION means the order stays where it is.
+        actions[state << FLAG_BITS | flags] is the action of the edge that
+        fires there, or None; `actions` itself is None when no edge has one.
+        """
+        if len(self.states) >= NO_TRANSITION:
+            raise ValueError("the compiled table holds at most 254 states")
+        table = array("H", [0]) * (len(self.states) * FLAG_COMBINATIONS)
+        actions = [None] * len(table)
+        for state in range(len(self.states)):
+            idle = self._idle_notes.get(state, self._note_code("No action"))
+            for flags in range(FLAG_COMBINATIONS):
+                slot = state << FLAG_BITS | flags
+                entry = NO_TRANSITION << 8 | idle
+                for guard, target, note, action in self._edges[state]:
+                    if guard(flags):
+                        entry = target << 8 | note
+                        actions[slot] = action
+                        break
+                table[slot] = entry
+        # Checked last: the loop above may add the default "No action" note
+        if len(self.notes) > 255:
+            raise ValueError("the compiled table holds at most 255 notes")
+        self.table = table
+        self.actions = actions if any(actions) else None
+        return self
+
+    def action_for(self, state, flags):
+        """The action run when an order in `state` with `flags` moves on."""
+        return self.actions[state << FLAG_BITS | flags] if self.actions else None
+
+def build_order_machine():
+    """The process_order state machine from 08_common_patterns.py."""
+    machine = StateMachine(STATES)
+    machine.add_transition("new", "payment_pending", "Order created and waiting for payment")
+    machine.add_transition("payment_pending", "preparing", "Payment received, preparing order",
+                           guard=lambda flags: flags & PAYMENT_RECEIVED)
+    machine.set_idle_note("payment_pending", "Payment reminder sent")
+    machine.add_transition("preparing", "shipping", "Order prepared and ready for shipping")
+    machine.add_transition("shipping", "completed", "Order delivered and completed",
+                           guard=lambda flags: flags & DELIVERED)
+    machine.set_idle_note("shipping", "Shipping update: order in transit")
+    machine.set_idle_note("completed", "Order already completed, no action needed")
+    machine.set_idle_note("cancelled", "Order is cancelled, no further processing")
+    return machine.compile()
+
+# ----------------------------------------------------------------------------
+# 3. Append-Only Event Log
+# ----------------------------------------------------------------------------
+
+# Record: order index, kind, value, note code
+#   kind 0 = state change/note (value = new state), kind 1 = flags (value = flags)
+_RECORD = struct.Struct("<IBBH")
+EVENT_STEP = 0
+EVENT_FLAGS = 1
+
+class EventLog:
+    """Fixed-size binary records appended to a file, buffered in memory.
+
+    Records refer to orders by index. The id of each new order is appended
+    to a companion file (path + ".ids", one id per line), whose line number
+    is the index, so the two files together are enough to recover.
+    """
+
+    def __init__(self, path, buffer_records=65_536):
+        self.path = path
+        self.ids_path = path + ".ids"
+        self._file = open(path, "ab")
+        self._ids_file = open(self.ids_path, "ab")
+        self._buffer = bytearray()
+        self._ids_buffer = bytearray()
+        self._limit = buffer_records * _RECORD.size
+
+    def add_id(self, order_id):
+        """Record the id of the next order index."""
+        encoded = order_id.encode()
+        if b"\n" in encoded:
+            raise ValueError(f"Order id cannot contain a newline: {order_id!r}")
+        self._ids_buffer += encoded + b"\n"
+
+    def append(self, index, kind, value, note=0):
+        self._buffer += _RECORD.pack(index, kind, value, note)
+        if len(self._buffer) >= self._limit:
+            self.flush()
+
+    def flush(self):
+        """Write buffered ids, then records, and hand them to the operating system.
+
+        Ids go first, so every record on disk refers to an id on disk.
+        """
+        if self._ids_buffer:
+            self._ids_file.write(self._ids_buffer)
+            self._ids_buffer.clear()
+        self._ids_file.flush()
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._ids_file.close()
+        self._file.close()
+
+    @staticmethod
+    def read_ids(path):
+        """Return the order ids recorded next to the log at `path`."""
+        with open(path + ".ids", "rb") as file:
+            data = file.read()
+        # A crash may leave a partial last line; ignore it
+        return data[:data.rfind(b"\n") + 1].decode().splitlines()
+
+    @staticmethod
+    def replay(path):
+        """Yield (index, kind, value, note) for every complete record."""
+        with open(path, "rb") as file:
+            data = file.read()
+        # A crash may leave a partial last record; ignore it
+        usable = len(data) - len(data) % _RECORD.size
+        yield from _RECORD.iter_unpack(data[:usable])
+
+# ----------------------------------------------------------------------------
+# 4. Compact Order Store
+# ----------------------------------------------------------------------------
+
+class OrderStore:
+    """Millions of orders as two byte arrays plus an id list.
+
+    Attributes:
+        ids (list): Order ids by index
+        states (bytearray): State code per order
+        flags (bytearray): Flag bits per order
+        recent_notes (deque): The last N (order id, note) pairs
+    """
+
+    def __init__(self, machine, log=None, recent_notes=1_000):
+        self.machine = machine
+        self.log = log
+        self.ids = []
+        self.index_of = {}
+        self.states = bytearray()
+        self.flags = bytearray()
+        self.recent_notes = deque(maxlen=recent_notes)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add_order(self, order_id, status="new", flags=0):
+        index = len(self.ids)
+        self.ids.append(order_id)
+        self.index_of[order_id] = index
+        self.states.append(self.machine.codes[status])
+        self.flags.append(flags)
+        if self.log:
+            self.log.add_id(order_id)
+            self.log.append(index, EVENT_STEP, self.states[index])
+            if flags:
+                self.log.append(index, EVENT_FLAGS, flags)
+        return index
+
+    def set_flag(self, order_id, flag, value=True):
+        index = self.index_of[order_id]
+        self.flags[index] = self.flags[index] | flag if value else self.flags[index] & ~flag
+        if self.log:
+            self.log.append(index, EVENT_FLAGS, self.flags[index])
+
+    def status(self, order_id):
+        return self.machine.states[self.states[self.index_of[order_id]]]
+
+    def process_order(self, order_id):
+        """Advance one order. Returns (new status, note text)."""
+        index = self.index_of[order_id]
+        self._step_range(index, index + 1)
+        return self.status(order_id), self.machine.notes[self.recent_notes[-1][1]]
+
+    def process_all(self):
+        """Advance every order by one step.
+
+        Returns:
+            int: Number of orders that changed state
+        """
+        return self._step_range(0, len(self.ids))
+
+    def _step_range(self, start, stop):
+        machine = self.machine
+        table = machine.table
+        states, flags = self.states, self.flags
+        log_append = self.log.append if self.log else None
+        recent = self.recent_notes.append
+        actions = machine.actions
+        changed = 0
+        for index in range(start, stop):
+            slot = states[index] << FLAG_BITS | flags[index]
+            entry = table[slot]
+            target, note = entry >> 8, entry & 0xFF
+            if target != NO_TRANSITION:
+                states[index] = target
+                changed += 1
+                if actions:
+                    action = actions[slot]
+                    if action:
+                        action(self, index)
+            if log_append:
+                log_append(index, EVENT_STEP, states[index], note)
+            recent((index, note))
+        return changed
+
+    @classmethod
+    def recover(cls, machine, log_path):
+        """Rebuild ids, states and flags from an event log and its id file.
+
+        Args:
+            machine (StateMachine): The compiled machine
+            log_path (str): Log written by a previous run
+
+        Returns:
+            OrderStore: Store with every order's last logged state
+        """
+        store = cls(machine)
+        store.ids = EventLog.read_ids(log_path)
+        store.index_of = {order_id: i for i, order_id in enumerate(store.ids)}
+        count = len(store.ids)
+        store.states = bytearray(count)
+        store.flags = bytearray(count)
+        for index, kind, value, note in EventLog.replay(log_path):
+            if index >= count:
+                continue  # id lost in the crash; the order cannot be named
+            if kind == EVENT_STEP:
+                store.states[index] = value
+            else:
+                store.flags[index] = value
+        return store
+
+# ----------------------------------------------------------------------------
+# 5. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    import time
+
+    machine = build_order_machine()
+
+    with tempfile.TemporaryDirectory() as folder:
+        log_path = os.path.join(folder, "orders.log")
+        log = EventLog(log_path)
+        store = OrderStore(machine, log)
+
+        store.add_order("ORD-12345")
+        print(store.process_order("ORD-12345"))
+        # ('payment_pending', 'Order created and waiting for payment')
+        print(store.process_order("ORD-12345"))
+        # ('payment_pending', 'Payment reminder sent')
+        store.set_flag("ORD-12345", PAYMENT_RECEIVED)
+        print(store.process_order("ORD-12345"))
+        # ('preparing', 'Payment received, preparing order')
+
+        # A million orders, each stepped three times
+        for i in range(1_000_000):
+            store.add_order(f"ORD-{i:07d}", flags=random.getrandbits(FLAG_BITS))
+        start = time.perf_counter()
+        changed = sum(store.process_all() for _ in range(3))
+        elapsed = time.perf_counter() - start
+        print(f"\n3 steps over {len(store):,} orders: {elapsed:.2f}s, "
+              f"{changed:,} transitions")
+        print(f"In-memory notes kept: {len(store.recent_notes):,}")
+        log.close()
+        print(f"Event log: {os.path.getsize(log_path) / 1e6:.1f} MB, "
+              f"id file: {os.path.getsize(log.ids_path) / 1e6:.1f} MB")
+
+        # Simulate a crash: rebuild everything from the log alone
+        start = time.perf_counter()
+        recovered = OrderStore.recover(machine, log_path)
+        identical = (recovered.ids == store.ids and recovered.states == store.states
+                     and recovered.flags == store.flags)
+        print(f"Recovered in {time.perf_counter() - start:.2f}s, identical: {identical}")
+        print(f"Recovered status of ORD-12345: {recovered.status('ORD-12345')}")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Describe a state machine as data: edges with guards, notes and actions
+# - Guards that depend only on a few flags can be compiled into a table
+# - Store millions of small records as bytes in compact arrays
+# - Bound in-memory history with deque(maxlen=...) instead of growing lists
+# - An append-only log of fixed-size records is cheap and replayable
+# ============================================================================
@@ -0,0 +1,339 @@
+# ============================================================================
+# FILENAME: 12_feature_flag_bitsets.py
+# DESCRIPTION: Demonstrates evaluating feature flags for a whole batch of users
+#              at once with bitwise operations on packed bitsets
+# ============================================================================
+
+"""
+update_feature_flags in 08_common_patterns.py copies the flag dict and
+re-evaluates every boolean rule once per user. For a million users that is a
+million dict copies and several million Python-level `and`/`or` checks.
+
+Python integers can be any size, and &, | and ~ on them run in C over all
+of their bits at once. So instead of one dict per user, we store one big
+integer per attribute, where bit i is that attribute for user i:
+
+    is_premium  = 0b1010...   (user 1 and user 3 are premium)
+    is_mobile   = 0b0110...
+
+A rule like "premium or developer" then becomes a single `|` between two
+integers, which evaluates the rule for every user in the batch at once.
+
+This module provides:
+- UserBatch: packs a list of user dicts into attribute bitsets
+- Rule expressions (attr("is_premium") | attr("is_developer")) that are
+  compiled into bitwise operations
+- Percentage rollouts with deterministic hashing, so a user always lands in
+  the same bucket across runs and machines
+- A versioned, immutable RuleSnapshot that can be shipped to worker
+  processes and evaluated there, read-only
+"""
+
+import zlib
+from operator import itemgetter
+
+# ----------------------------------------------------------------------------
+# 1. Packing Booleans into Bitsets
+# ----------------------------------------------------------------------------
+
+_BOOL_TO_DIGIT = bytes.maketrans(b"\x00\x01", b"01")
+
+def pack_bools(values):
+    """Pack an iterable of booleans into an int (bit i = values[i]).
+
+    The conversion goes through bytes.translate and int(text, 2), both of
+    which run in C.
+    """
+    flags = bytes(map(bool, values))
+    if not flags:
+        return 0
+    return int(flags.translate(_BOOL_TO_DIGIT)[::-1], 2)
+
+def unpack_bits(bitset, count):
+    """Return a list of count booleans from a bitset."""
+    text = format(bitset, "b").zfill(count)[::-1]
+    return [digit == "1" for digit in text[:count]]
+
+# ----------------------------------------------------------------------------
+# 2. A Batch of Users as Attribute Bitsets
+# ----------------------------------------------------------------------------
+
+class UserBatch:
+    """Users packed column-wise: one bitset per boolean attribute.
+
+    Attributes:
+        count (int): Number of users in the batch
+        user_ids (list): User ids by position
+        bits (dict): Attribute name -> bitset. Categorical values are
+            stored as "name=value" entries, e.g. "device_type=mobile".
+    """
+
+    def __init__(self, user_ids, bits):
+        self.user_ids = user_ids
+        self.count = len(user_ids)
+        self.bits = bits
+        self.all_users = (1 << self.count) - 1
+        self.rollout_cache = {}
+
+    @classmethod
+    def from_dicts(cls, users, boolean_fields, categorical_fields=(), id_field="username"):
+        """Pack user dicts into bitsets.
+
+        Args:
+            users (list): User dicts like user_profile in 08_common_patterns.py.
+                Nested fields use dotted names ("notification_preferences.enabled").
+            boolean_fields (iterable): Fields holding True/False
+            categorical_fields (iterable): Fields holding a small set of values
+            id_field (str, optional): Field used as the user id
+
+        Returns:
+            UserBatch: The packed batch
+        """
+        def getter(name):
+            # itemgetter runs in C; dotted names chain several of them
+            getters = [itemgetter(part) for part in name.split(".")]
+            if len(getters) == 1:
+                return getters[0]
+            def get(user):
+                for get_part in getters:
+                    user = get_part(user)
+                return user
+            return get
+
+        bits = {name: pack_bools(map(getter(name), users)) for name in boolean_fields}
+        for name in categorical_fields:
+            values = list(map(getter(name), users))
+            for value in set(values):
+                bits[f"{name}={value}"] = pack_bools(v == value for v in values)
+        return cls([user[id_field] for user in users], bits)
+
+# ----------------------------------------------------------------------------
+# 3. Rule Expressions
+# ----------------------------------------------------------------------------
+
+class Expr:
+    """A rule expression stored as a plain tuple tree (so it can be pickled).
+
+    Build expressions with attr(), const() and rollout() and combine them
+    with &, | and ~.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    def __and__(self, other):
+        return Expr(("and", self.tree, other.tree))
+
+    def __or__(self, other):
+        return Expr(("or", self.tree, other.tree))
+
+    def __invert__(self):
+        return Expr(("not", self.tree))
+
+    def __repr__(self):
+        return f"Expr({self.tree!r})"
+
+def attr(name):
+    """A user attribute (or "field=value" for categorical fields)."""
+    return Expr(("attr", name))
+
+def const(value):
+    """True for every user, or False for every user."""
+    return Expr(("const", bool(value)))
+
+def rollout(salt, percent):
+    """Enable for a deterministic `percent` of users.
+
+    Each user is hashed together with `salt` (usually the flag name) into
+    one of 10,000 buckets, so the same user always gets the same answer.
+    """
+    return Expr(("rollout", salt, int(round(percent * 100))))
+
+def rollout_bucket(salt, user_id):
+    """Deterministic bucket 0-9999 for a user (CRC32, fast and stable)."""
+    return zlib.crc32(f"{salt}:{user_id}".encode()) % 10_000
+
+def evaluate(tree, batch):
+    """Evaluate an expression tree for every user of a batch at once.
+
+    Returns:
+        int: Bitset with bit i set when the rule is true for user i
+    """
+    kind = tree[0]
+    if kind == "attr":
+        return batch.bits.get(tree[1], 0)
+    if kind == "and":
+        return evaluate(tree[1], batch) & evaluate(tree[2], batch)
+    if kind == "or":
+        return evaluate(tree[1], batch) | evaluate(tree[2], batch)
+    if kind == "not":
+        # Mask with all_users: ~ on a Python int would give a negative number
+        return batch.all_users & ~evaluate(tree[1], batch)
+    if kind == "const":
+        return batch.all_users if tree[1] else 0
+    if kind == "rollout":
+        # Hashing every user id is the only per-user work, so cache it
+        if tree not in batch.rollout_cache:
+            _, salt, threshold = tree
+            batch.rollout_cache[tree] = pack_bools(
+                rollout_bucket(salt, user_id) < threshold for user_id in batch.user_ids)
+        return batch.rollout_cache[tree]
+    raise ValueError(f"Unknown expression: {kind!r}")
+
+# ----------------------------------------------------------------------------
+# 4. Versioned Rule Snapshots
+# ----------------------------------------------------------------------------
+
+class RuleSnapshot:
+    """An immutable, versioned set of flag rules.
+
+    Snapshots only contain tuples and strings, so they pickle cheaply and
+    can be handed to worker processes, which only ever read them.
+    """
+
+    __slots__ = ("version", "rules")
+
+    def __init__(self, version, rules):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "rules", tuple((name, expr.tree) for name, expr in rules.items()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RuleSnapshot is read-only")
+
+    def __reduce__(self):
+        return (_rebuild_snapshot, (self.version, self.rules))
+
+    def evaluate(self, batch):
+        """Evaluate every flag for a batch.
+
+        Returns:
+            dict: Flag name -> bitset over the batch's users
+        """
+        return {name: evaluate(tree, batch) for name, tree in self.rules}
+
+def _rebuild_snapshot(version, rules):
+    return RuleSnapshot(version, {name: Expr(tree) for name, tree in rules})
+
+def flags_for_user(results, batch, user_index):
+    """Expand packed results back into one user's {flag: bool} dict."""
+    return {name: bool(bitset >> user_index & 1) for name, bitset in results.items()}
+
+def build_feature_rules(default_flags, version=1):
+    """The rules of update_feature_flags, declared once.
+
+    The default flags are the same for every user, so they become constants.
+    """
+    return RuleSnapshot(version, {
+        "dark_mode": attr("is_premium") | const(default_flags["dark_mode"]),
+        "beta_features": attr("is_developer") | (attr("is_premium") & attr("beta_opted_in")),
+        "notifications": attr("notification_preferences.enabled"),
+        "high_load_features": const(default_flags["high_load_features"])
+                              & ~(attr("device_type=mobile") & ~attr("is_premium")),
+        "essential_features": const(True),
+        "new_checkout": rollout("new_checkout", 25.0),
+    })
+
+# ----------------------------------------------------------------------------
+# 5. Parallel Evaluation
+# ----------------------------------------------------------------------------
+
+_worker_snapshot = None
+
+def _init_worker(snapshot):
+    """Store the snapshot once per worker process."""
+    global _worker_snapshot
+    _worker_snapshot = snapshot
+
+def _evaluate_in_worker(batch):
+    return _worker_snapshot.version, _worker_snapshot.evaluate(batch)
+
+def evaluate_batches(snapshot, batches, processes=2):
+    """Evaluate several UserBatches in a process pool.
+
+    The snapshot is sent to each worker once, through the pool initializer,
+    instead of with every batch.
+
+    Returns:
+        list: (snapshot version, results) per batch, in order
+    """
+    from multiprocessing import Pool
+    with Pool(processes, initializer=_init_worker, initargs=(snapshot,)) as pool:
+        return pool.map(_evaluate_in_worker, batches)
+
+# ----------------------------------------------------------------------------
+# 6. Demonstration
+# ----------------------------------------------------------------------------
+
+BOOLEAN_FIELDS = ["is_premium", "is_developer", "beta_opted_in",
+                  "notification_preferences.enabled"]
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    def update_feature_flags(user, feature_flags):
+        """The per-user version from 08_common_patterns.py."""
+        updated_flags = feature_flags.copy()
+        updated_flags["dark_mode"] = user["is_premium"] or feature_flags["dark_mode"]
+        updated_flags["beta_features"] = (user["is_developer"] or
+                                          (user["is_premium"] and user["beta_opted_in"]))
+        updated_flags["notifications"] = user["notification_preferences"]["enabled"]
+        if user["device_type"] == "mobile" and not user["is_premium"]:
+            updated_flags["high_load_features"] = False
+        updated_flags["essential_features"] = True
+        return updated_flags
+
+    default_flags = {"dark_mode": False, "beta_features": False, "notifications": True,
+                     "high_load_features": True, "essential_features": True}
+
+    users = [{
+        "username": f"user{i}",
+        "is_premium": random.random() < 0.2,
+        "is_developer": random.random() < 0.05,
+        "beta_opted_in": random.random() < 0.5,
+        "device_type": random.choice(["desktop", "mobile", "tablet"]),
+        "notification_preferences": {"enabled": random.random() < 0.7},
+    } for i in range(500_000)]
+
+    start = time.perf_counter()
+    expected = [update_feature_flags(user, default_flags) for user in users]
+    per_user_time = time.perf_counter() - start
+
+    rules = build_feature_rules(default_flags)
+    start = time.perf_counter()
+    batch = UserBatch.from_dicts(users, BOOLEAN_FIELDS, ["device_type"])
+    pack_time = time.perf_counter() - start
+    start = time.perf_counter()
+    results = rules.evaluate(batch)
+    evaluate_time = time.perf_counter() - start
+
+    print(f"Per-user dicts: {per_user_time:.2f}s")
+    print(f"Bitsets: pack {pack_time:.2f}s (once per batch), "
+          f"evaluate {evaluate_time:.3f}s")
+    start = time.perf_counter()
+    rules.evaluate(batch)
+    print(f"Re-evaluating the packed batch: {time.perf_counter() - start:.4f}s")
+    sample = random.sample(range(len(users)), 1_000)
+    same = all(
+        all(flags_for_user(results, batch, i)[name] == bool(expected[i][name])
+            for name in default_flags)
+        for i in sample)
+    print(f"Same flags as update_feature_flags: {same}")
+    for name, bitset in results.items():
+        print(f"  {name:20} enabled for {bin(bitset).count('1'):,} users")
+
+    # Evaluate several batches in worker processes with a shared snapshot
+    batches = [UserBatch.from_dicts(users[i:i + 100_000], BOOLEAN_FIELDS, ["device_type"])
+               for i in range(0, 300_000, 100_000)]
+    outputs = evaluate_batches(rules, batches)
+    print(f"\nWorker results use snapshot version(s): {sorted({v for v, _ in outputs})}")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - A Python int can act as a bitset with one bit per user
+# - &, | and ~ on big ints evaluate a rule for a whole batch in C
+# - Mask ~x with an all-ones value, since ~ on an int is negative
+# - Hash (flag, user id) into buckets for stable percentage rollouts
+# - Keep rules as plain tuples in an immutable, versioned snapshot so they
+#   can be shared with worker processes
+# ============================================================================
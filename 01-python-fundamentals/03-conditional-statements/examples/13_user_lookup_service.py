@@ -0,0 +1,283 @@
+# ============================================================================
+# FILENAME: 13_user_lookup_service.py
+# DESCRIPTION: Demonstrates a cached user lookup service built around a shared,
+#              immutable null object (the guest user)
+# ============================================================================
+
+"""
+get_user in 08_common_patterns.py shows the null object pattern, but every
+call rebuilds its users dict, creates two User objects and, on a miss,
+allocates a brand-new GuestUser(). On a hot path that is several object
+allocations per lookup.
+
+This module keeps the same pattern and removes the waste:
+- User and GuestUser use __slots__, and the features they may access are
+  precomputed frozensets (shared class attributes, not per-call lists)
+- There is exactly one guest object, GUEST. It is immutable, so sharing it
+  between all callers is safe
+- A module-level repository stands in for the database, and loaded users
+  are kept in a bounded LRU cache
+- Unknown ids are remembered too ("negative caching"), so repeated lookups
+  of a missing id do not hit the database again
+- get_users(ids) fetches a whole list, loading all cache misses in one
+  bulk query
+"""
+
+from collections import OrderedDict
+
+# ----------------------------------------------------------------------------
+# 1. Slotted User Types with Precomputed Feature Sets
+# ----------------------------------------------------------------------------
+
+class User:
+    """A standard user with profile information."""
+
+    __slots__ = ("user_id", "name", "email")
+
+    is_guest = False
+    RESTRICTED_FEATURES = frozenset({"admin", "analytics"})
+
+    def __init__(self, user_id, name, email):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+
+    def get_display_name(self):
+        """Get the display name for the user."""
+        return self.name
+
+    def can_access_feature(self, feature):
+        """Check if the user can access a specific feature."""
+        return feature not in self.RESTRICTED_FEATURES
+
+    def get_email_for_notifications(self):
+        """Get the email for sending notifications."""
+        return self.email
+
+    def __repr__(self):
+        return f"User({self.user_id!r}, {self.name!r})"
+
+class GuestUser:
+    """A null object representing a guest user.
+
+    Guests carry no per-instance data, so one shared instance (GUEST) is
+    enough. Assigning attributes raises, which keeps the shared object safe.
+    """
+
+    __slots__ = ()
+
+    user_id = "guest"
+    name = "Guest"
+    email = None
+    is_guest = True
+    ALLOWED_FEATURES = frozenset({"browse", "search", "view_public"})
+
+    def get_display_name(self):
+        """Get the display name for the guest user."""
+        return "Guest User"
+
+    def can_access_feature(self, feature):
+        """Check if the guest can access a specific feature."""
+        return feature in self.ALLOWED_FEATURES
+
+    def get_email_for_notifications(self):
+        """Get the email for sending notifications (none for guests)."""
+        return None
+
+    def __repr__(self):
+        return "GUEST"
+
+GUEST = GuestUser()
+
+# ----------------------------------------------------------------------------
+# 2. The Backing Repository (a stand-in for a database)
+# ----------------------------------------------------------------------------
+
+class UserRepository:
+    """Simulated database of user rows, with single and bulk loading.
+
+    Attributes:
+        queries (int): Number of load calls made, to show cache effects
+    """
+
+    def __init__(self, rows):
+        self._rows = {row[0]: row for row in rows}
+        self.queries = 0
+
+    def load(self, user_id):
+        """Load one user, or None if there is no such user."""
+        self.queries += 1
+        row = self._rows.get(user_id)
+        return User(*row) if row else None
+
+    def load_many(self, user_ids):
+        """Load many users in one query. Missing ids are left out."""
+        self.queries += 1
+        rows = self._rows
+        return {user_id: User(*rows[user_id]) for user_id in user_ids if user_id in rows}
+
+# ----------------------------------------------------------------------------
+# 3. The Lookup Service
+# ----------------------------------------------------------------------------
+
+class UserLookupService:
+    """Cached lookups that return GUEST for unknown ids.
+
+    Attributes:
+        hits (int): Lookups answered from a cache
+        misses (int): Lookups that needed the repository
+    """
+
+    def __init__(self, repository, capacity=10_000, negative_capacity=10_000):
+        self.repository = repository
+        self._cache = OrderedDict()          # user_id -> User (LRU order)
+        self._unknown = OrderedDict()        # user_id -> None (LRU order)
+        self._capacity = capacity
+        self._negative_capacity = negative_capacity
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, user_id, user):
+        if user is None:
+            self._unknown[user_id] = None
+            if len(self._unknown) > self._negative_capacity:
+                self._unknown.popitem(last=False)
+        else:
+            self._cache[user_id] = user
+            if len(self._cache) > self._capacity:
+                self._cache.popitem(last=False)
+
+    def get_user(self, user_id):
+        """Get a user by ID, or the shared GUEST object if not found.
+
+        Args:
+            user_id (str): The user ID to look up
+
+        Returns:
+            User or GuestUser: The found user or GUEST
+        """
+        user = self._cache.get(user_id)
+        if user is not None:
+            self._cache.move_to_end(user_id)
+            self.hits += 1
+            return user
+        if user_id in self._unknown:
+            self._unknown.move_to_end(user_id)
+            self.hits += 1
+            return GUEST
+
+        self.misses += 1
+        user = self.repository.load(user_id)
+        self._remember(user_id, user)
+        return user if user is not None else GUEST
+
+    def get_users(self, user_ids):
+        """Get many users at once; all cache misses load in one query.
+
+        Returns:
+            list: A User or GUEST for each id, in the same order
+        """
+        user_ids = list(user_ids)
+        cache, unknown = self._cache, self._unknown
+        found = {}  # answers for this call, kept here so eviction cannot lose them
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            user = cache.get(user_id)
+            if user is not None:
+                cache.move_to_end(user_id)
+                found[user_id] = user
+            elif user_id in unknown:
+                unknown.move_to_end(user_id)
+            else:
+                missing.append(user_id)
+        if missing:
+            self.misses += len(missing)
+            loaded = self.repository.load_many(missing)
+            for user_id in missing:
+                self._remember(user_id, loaded.get(user_id))
+            found.update(loaded)
+        self.hits += len(user_ids) - len(missing)
+        return [found.get(user_id, GUEST) for user_id in user_ids]
+
+    def invalidate(self, user_id):
+        """Forget a cached user or unknown id (e.g. after a signup or edit)."""
+        self._cache.pop(user_id, None)
+        self._unknown.pop(user_id, None)
+
+# Module-level repository and service: built once, shared by every call
+_repository = UserRepository([
+    ("user123", "John Doe", "john@example.com"),
+    ("user456", "Jane Smith", "jane@example.com"),
+])
+_service = UserLookupService(_repository)
+
+def get_user(user_id):
+    """Get a user by ID, returning the shared GUEST if not found."""
+    return _service.get_user(user_id)
+
+def get_users(user_ids):
+    """Get many users by ID, returning GUEST for unknown ids."""
+    return _service.get_users(user_ids)
+
+# ----------------------------------------------------------------------------
+# 4. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import time
+
+    john = get_user("user123")
+    print(f"User: {john.get_display_name()}")                        # John Doe
+    print(f"Can access 'admin': {john.can_access_feature('admin')}")  # False
+
+    unknown = get_user("nonexistent")
+    print(f"\nUser: {unknown.get_display_name()}")                   # Guest User
+    print(f"Is guest: {unknown.is_guest}")                            # True
+    print(f"Same guest object every time: {get_user('other') is get_user('nonexistent')}")
+    try:
+        GUEST.name = "Hacker"
+    except AttributeError:
+        print("GUEST is read-only")
+
+    print(f"Bulk: {get_users(['user456', 'missing', 'user123'])}")
+    # Bulk: [User('user456', 'Jane Smith'), GUEST, User('user123', 'John Doe')]
+
+    class OldUser:
+        """The dict-based User from 08_common_patterns.py."""
+        def __init__(self, user_id, name, email):
+            self.user_id, self.name, self.email = user_id, name, email
+
+    class OldGuest:
+        def __init__(self):
+            self.user_id, self.name, self.email = "guest", "Guest", None
+
+    def get_user_original(user_id):
+        """The per-call version from 08_common_patterns.py."""
+        users = {
+            "user123": OldUser("user123", "John Doe", "john@example.com"),
+            "user456": OldUser("user456", "Jane Smith", "jane@example.com"),
+        }
+        return users.get(user_id, OldGuest())
+
+    ids = ["user123", "user456", "nobody"] * 100_000
+    start = time.perf_counter()
+    for user_id in ids:
+        get_user_original(user_id)
+    original_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for user_id in ids:
+        get_user(user_id)
+    cached_time = time.perf_counter() - start
+    print(f"\n300,000 lookups: original {original_time:.2f}s, cached {cached_time:.2f}s")
+    print(f"Repository queries: {_repository.queries}, cache hits: {_service.hits:,}")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Build lookup tables once at module level, not inside the function
+# - One immutable null object can be shared by every caller
+# - __slots__ and class-level frozensets keep per-object memory small
+# - An OrderedDict with move_to_end/popitem makes a simple bounded LRU
+# - Cache "not found" answers too, so missing ids stay cheap
+# - Bulk lookups should load every cache miss in a single query
+# ============================================================================
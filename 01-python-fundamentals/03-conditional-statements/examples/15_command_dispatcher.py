@@ -0,0 +1,353 @@
+# ============================================================================
+# FILENAME: 15_command_dispatcher.py
+# DESCRIPTION: Demonstrates a decorator-based command registry that dispatches
+#              streams of commands, with async handlers and per-command stats
+# ============================================================================
+
+"""
+dispatch_command in 08_common_patterns.py builds a dict of six lambdas on
+every call and then throws it away; command_functions in 04_elif.py has
+the same shape. Building the dict costs more than running most commands.
+
+This module builds the registry once, at import time:
+- Handlers register themselves with the @command decorator, so adding a
+  command never means editing a central dict
+- Each registry entry is a Command object created once. Dispatch is one
+  dict lookup plus a call; the counters live on the Command itself, so
+  nothing is allocated per call for bookkeeping
+- Handlers may be plain functions or async functions. dispatch_many runs a
+  stream of commands (from a JSONL file or stdin) on a bounded pool of
+  asyncio workers, so slow async handlers overlap
+- Every command records its call count, error count and latency
+"""
+
+import asyncio
+import inspect
+import json
+import sys
+import time
+
+# ----------------------------------------------------------------------------
+# 1. The Registry
+# ----------------------------------------------------------------------------
+
+class Command:
+    """A registered handler plus its counters.
+
+    Attributes:
+        name (str): Command name
+        handler (callable): handler(args) -> result (may be async)
+        is_async (bool): True for async handlers
+        calls (int): Times dispatched
+        errors (int): Times the handler raised
+        total_ns (int): Total handler time in nanoseconds
+        max_ns (int): Slowest single call in nanoseconds
+    """
+
+    __slots__ = ("name", "handler", "is_async", "calls", "errors", "total_ns", "max_ns")
+
+    def __init__(self, name, handler):
+        self.name = name
+        self.handler = handler
+        self.is_async = inspect.iscoroutinefunction(handler)
+        self.calls = self.errors = self.total_ns = self.max_ns = 0
+
+    def record(self, elapsed_ns, failed):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        if failed:
+            self.errors += 1
+
+COMMANDS = {}
+
+def command(name=None):
+    """Decorator that registers a handler under `name` (default: its own name).
+
+    Example:
+        @command("greet")
+        def greet(args):
+            return f"Hello, {args.get('name', 'Guest')}!"
+    """
+    def decorator(handler):
+        key = name or handler.__name__
+        if key in COMMANDS:
+            raise ValueError(f"Command already registered: {key}")
+        COMMANDS[key] = Command(key, handler)
+        return handler
+    return decorator
+
+# ----------------------------------------------------------------------------
+# 2. Handlers (the commands from 08_common_patterns.py and 04_elif.py)
+# ----------------------------------------------------------------------------
+
+@command("greet")
+def greet(args):
+    return f"Hello, {args.get('name', 'Guest')}!"
+
+@command("add")
+def add(args):
+    return f"Result: {args.get('a', 0) + args.get('b', 0)}"
+
+@command("subtract")
+def subtract(args):
+    return f"Result: {args.get('a', 0) - args.get('b', 0)}"
+
+@command("multiply")
+def multiply(args):
+    return f"Result: {args.get('a', 0) * args.get('b', 0)}"
+
+@command("divide")
+def divide(args):
+    if args.get("b", 0) == 0:
+        return "Error: Division by zero"
+    return f"Result: {args.get('a', 0) / args['b']}"
+
+@command("help")
+def help_command(args):
+    return "Available commands: " + ", ".join(COMMANDS)
+
+@command("quit")
+def quit_command(args):
+    return "Exiting the program"
+
+@command("open")
+def open_command(args):
+    return f"Opening {args.get('path', 'a file')}"
+
+@command("fetch")
+async def fetch(args):
+    """An I/O-bound command: waits as if calling a remote service."""
+    await asyncio.sleep(args.get("delay", 0.01))
+    return f"Fetched {args.get('url', '?')}"
+
+# ----------------------------------------------------------------------------
+# 3. Dispatching
+# ----------------------------------------------------------------------------
+
+def _unknown(name, args):
+    if not name:
+        return f"Invalid input: {args.get('error', 'missing command')}"
+    return f"Unknown command: {name}. Type 'help' to see available commands."
+
+def dispatch_command(name, args):
+    """Run one command synchronously.
+
+    Async handlers are run to completion with asyncio.run(), so call
+    dispatch_async instead from inside an event loop.
+
+    Returns:
+        str: The handler's result, or an error message
+    """
+    entry = COMMANDS.get(name)
+    if entry is None:
+        return _unknown(name, args)
+    start = time.perf_counter_ns()
+    try:
+        result = asyncio.run(entry.handler(args)) if entry.is_async else entry.handler(args)
+    except Exception as error:
+        entry.record(time.perf_counter_ns() - start, True)
+        return f"Error: {error}"
+    entry.record(time.perf_counter_ns() - start, False)
+    return result
+
+async def dispatch_async(name, args):
+    """Run one command inside an event loop, awaiting async handlers."""
+    entry = COMMANDS.get(name)
+    if entry is None:
+        return _unknown(name, args)
+    start = time.perf_counter_ns()
+    try:
+        result = await entry.handler(args) if entry.is_async else entry.handler(args)
+    except Exception as error:
+        entry.record(time.perf_counter_ns() - start, True)
+        return f"Error: {error}"
+    entry.record(time.perf_counter_ns() - start, False)
+    return result
+
+def read_commands(source):
+    """Yield (command, args) from JSONL lines.
+
+    Each line looks like {"command": "add", "args": {"a": 1, "b": 2}}.
+    Blank lines are skipped; a malformed line yields ("", {"error": ...}),
+    which dispatches to an "Invalid input" message instead of stopping
+    the stream.
+
+    Args:
+        source (str or file): A path, "-" for stdin, or an open text file
+    """
+    if source == "-":
+        yield from _parse_lines(sys.stdin)
+    elif isinstance(source, str):
+        with open(source, encoding="utf-8") as file:
+            yield from _parse_lines(file)
+    else:
+        yield from _parse_lines(source)
+
+def _parse_lines(lines):
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            yield record["command"], record.get("args", {})
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            yield "", {"error": f"line {number}: {error}"}
+
+async def dispatch_many(commands, workers=16, on_result=None):
+    """Dispatch a stream of (command, args) pairs on a bounded worker pool.
+
+    At most `workers` commands run at once, and the queue holds at most
+    2 * workers pending commands. With on_result, nothing else is kept, so
+    memory stays bounded for any stream. Without it, every result is kept
+    for the returned list, so pass on_result for unbounded streams.
+
+    Handler errors become "Error: ..." results (see dispatch_async). Any
+    other failure in a worker, such as on_result raising, stops the whole
+    pool and is raised here.
+
+    Args:
+        commands (iterable): (command, args) pairs, e.g. from read_commands()
+        workers (int, optional): Number of concurrent workers
+        on_result (callable, optional): on_result(index, command, result)
+            is called as each command finishes. Without it, the results are
+            collected and returned in input order.
+
+    Returns:
+        list or int: The results, or the number of commands when on_result
+            is given
+    """
+    queue = asyncio.Queue(maxsize=2 * workers)
+    results = {} if on_result is None else None
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, name, args = item
+            result = await dispatch_async(name, args)
+            if results is None:
+                on_result(index, name, result)
+            else:
+                results[index] = result
+
+    async def feed():
+        count = 0
+        for count, (name, args) in enumerate(commands, 1):
+            await queue.put((count - 1, name, args))
+        for _ in range(workers):
+            await queue.put(None)
+        return count
+
+    # The feeder runs as a task next to the workers: if a worker dies,
+    # gather() raises at once instead of leaving the feeder blocked on a
+    # full queue that nobody drains
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    tasks.append(asyncio.create_task(feed()))
+    try:
+        count = (await asyncio.gather(*tasks))[-1]
+    finally:
+        for task in tasks:
+            task.cancel()
+    if results is None:
+        return count
+    return [results[i] for i in range(count)]
+
+# ----------------------------------------------------------------------------
+# 4. Statistics
+# ----------------------------------------------------------------------------
+
+def command_stats():
+    """Return {command: {calls, errors, mean_ms, max_ms}} for used commands."""
+    return {
+        entry.name: {
+            "calls": entry.calls,
+            "errors": entry.errors,
+            "mean_ms": entry.total_ns / entry.calls / 1e6,
+            "max_ms": entry.max_ns / 1e6,
+        }
+        for entry in COMMANDS.values() if entry.calls
+    }
+
+def reset_stats():
+    for entry in COMMANDS.values():
+        entry.calls = entry.errors = entry.total_ns = entry.max_ns = 0
+
+# ----------------------------------------------------------------------------
+# 5. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import io
+    import random
+
+    commands = [
+        ("greet", {"name": "Alice"}),
+        ("add", {"a": 5, "b": 3}),
+        ("divide", {"a": 20, "b": 4}),
+        ("divide", {"a": 10, "b": 0}),
+        ("multiply", {"a": "x", "b": [1]}),   # the handler raises TypeError
+        ("unknown", {}),
+        ("help", {}),
+    ]
+    for name, args in commands:
+        print(f"Command '{name}': {dispatch_command(name, args)}")
+
+    def dispatch_command_original(command, args):
+        """The version from 08_common_patterns.py, which rebuilds its dict."""
+        command_handlers = {
+            "greet": lambda args: f"Hello, {args.get('name', 'Guest')}!",
+            "add": lambda args: f"Result: {args.get('a', 0) + args.get('b', 0)}",
+            "subtract": lambda args: f"Result: {args.get('a', 0) - args.get('b', 0)}",
+            "multiply": lambda args: f"Result: {args.get('a', 0) * args.get('b', 0)}",
+            "divide": lambda args: f"Result: {args.get('a', 0) / args.get('b', 1)}" if args.get('b', 0) != 0 else "Error: Division by zero",
+            "help": lambda args: "Available commands: " + ", ".join(command_handlers.keys())
+        }
+        if command in command_handlers:
+            return command_handlers[command](args)
+        return f"Unknown command: {command}. Type 'help' to see available commands."
+
+    args = {"a": 5, "b": 3}
+    start = time.perf_counter()
+    for _ in range(500_000):
+        dispatch_command_original("add", args)
+    original_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(500_000):
+        dispatch_command("add", args)
+    registry_time = time.perf_counter() - start
+    print(f"\n500,000 dispatches: rebuilt dict {original_time:.2f}s, "
+          f"registry {registry_time:.2f}s (including latency counters)")
+
+    # A JSONL stream mixing fast commands with slow async ones
+    reset_stats()
+    lines = []
+    for i in range(20_000):
+        if i % 20 == 0:
+            lines.append(json.dumps({"command": "fetch", "args": {"url": f"/item/{i}", "delay": 0.01}}))
+        else:
+            lines.append(json.dumps({"command": random.choice(["add", "greet", "divide"]),
+                                     "args": {"a": i, "b": i % 7, "name": f"user{i}"}}))
+    lines.append("not json")
+    stream = io.StringIO("\n".join(lines))
+
+    start = time.perf_counter()
+    results = asyncio.run(dispatch_many(read_commands(stream), workers=64))
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(results):,} streamed commands in {elapsed:.2f}s "
+          f"(1,000 fetches of 10 ms each would take 10s one by one)")
+    print(f"Last result: {results[-1][:40]}...")
+    for name, stats in command_stats().items():
+        print(f"  {name:8} calls={stats['calls']:>6,} errors={stats['errors']} "
+              f"mean={stats['mean_ms']:.3f} ms max={stats['max_ms']:.1f} ms")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Build dispatch tables once at import time, never inside the function
+# - A registration decorator keeps each handler next to its own name
+# - Keep counters on the registry entry to avoid per-call bookkeeping objects
+# - An asyncio worker pool with a bounded queue handles unbounded streams
+# - Read JSONL line by line so the input never has to fit in memory
+# ============================================================================
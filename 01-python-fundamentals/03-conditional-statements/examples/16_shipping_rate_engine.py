@@ -0,0 +1,245 @@
+# ============================================================================
+# FILENAME: 16_shipping_rate_engine.py
+# DESCRIPTION: Demonstrates a shipping rate engine with a flat, integer-coded
+#              rate table, bisect weight bands and bulk quoting
+# ============================================================================
+
+"""
+calculate_shipping_best in 06_nested_conditionals.py already uses a lookup
+table, but it rebuilds the three-level nested shipping_rates dict and the
+["Canada", "Mexico"] list on every quote. It also hard-codes two weight
+categories (under 1 kg or not).
+
+This module builds the table once and flattens it:
+- Countries map to a region number through one dict lookup
+- Weight bands are arbitrary: a sorted list of lower bounds, searched with
+  bisect, so "0-1 kg, 1-5 kg, 5-20 kg, 20+ kg" needs no new code
+- All rates live in one array('d'), indexed by
+      (region * band_count + band) * 2 + express
+  so a quote is three small integer lookups and one array index
+- quote_many prices whole columns (countries, weights, express flags) with
+  map(), so millions of parcels are priced without a Python-level loop body
+- Tables load from two small CSV files: country -> region, and region and
+  weight band -> standard and express rates
+"""
+
+import csv
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from itertools import repeat
+from operator import add, mul
+
+# ----------------------------------------------------------------------------
+# 1. The Rate Table
+# ----------------------------------------------------------------------------
+
+class RateTable:
+    """Flat shipping rates indexed by (region, weight band, express).
+
+    Attributes:
+        regions (tuple): Region names; a region's number is its position
+        bounds (list): Sorted lower weight bound (kg) of every band
+        country_region (dict): Country -> region number
+        default_region (int): Region used for countries not in the dict
+        rates (array): Flat rate array, see the module docstring
+    """
+
+    def __init__(self, rates, country_regions, default_region):
+        """Build the table.
+
+        Args:
+            rates (dict): region -> list of (min_weight, standard, express).
+                Each region may use its own bands.
+            country_regions (dict): Country -> region name
+            default_region (str): Region for any other country
+        """
+        self.regions = tuple(rates)
+        codes = {name: code for code, name in enumerate(self.regions)}
+        if default_region not in codes:
+            raise ValueError(f"Default region has no rates: {default_region}")
+        unknown = set(country_regions.values()) - set(codes)
+        if unknown:
+            raise ValueError(f"Regions without rates: {', '.join(sorted(unknown))}")
+        self.country_region = {country: codes[region] for country, region in country_regions.items()}
+        self.default_region = codes[default_region]
+
+        # Every region is re-expressed over the union of all band bounds,
+        # so one bisect finds the band for every region
+        self.bounds = sorted({band[0] for bands in rates.values() for band in bands})
+        starts = {min(band[0] for band in bands) for bands in rates.values()}
+        if len(starts) != 1:
+            raise ValueError("every region must start its bands at the same weight")
+
+        self.rates = array("d")
+        for region in self.regions:
+            bands = sorted(rates[region])
+            region_bounds = [band[0] for band in bands]
+            for bound in self.bounds:
+                _, standard, express = bands[bisect_right(region_bounds, bound) - 1]
+                self.rates.extend((standard, express))
+        self._stride = len(self.bounds) * 2
+
+    def region_of(self, country):
+        return self.regions[self.country_region.get(country, self.default_region)]
+
+    def quote(self, country, weight, express=False):
+        """Price one parcel.
+
+        Raises:
+            ValueError: If the weight is below the lightest band
+        """
+        band = bisect_right(self.bounds, weight) - 1
+        if band < 0:
+            raise ValueError(f"Weight must be at least {self.bounds[0]} kg")
+        region = self.country_region.get(country, self.default_region)
+        return self.rates[region * self._stride + band * 2 + bool(express)]
+
+    def quote_many(self, countries, weights, express_flags):
+        """Price many parcels given as columns, in one pass.
+
+        Args:
+            countries (iterable): Destination country per parcel
+            weights (sequence): Weight in kg per parcel
+            express_flags (iterable): True/False (or 1/0) per parcel
+
+        Returns:
+            array: array('d') of prices, in input order
+
+        Raises:
+            ValueError: If the columns differ in length or a weight is below
+                the lightest band
+        """
+        # map() stops at the shortest column, so check the lengths first
+        if not isinstance(countries, Sequence):
+            countries = list(countries)
+        if not isinstance(express_flags, Sequence):
+            express_flags = list(express_flags)
+        if not len(countries) == len(weights) == len(express_flags):
+            raise ValueError("countries, weights and express_flags must have the same length")
+        if weights and min(weights) < self.bounds[0]:
+            raise ValueError(f"Weight must be at least {self.bounds[0]} kg")
+        bounds = self.bounds
+        # index = region * stride + (band + 1) * 2 + express - 2
+        regions = map(self.country_region.get, countries, repeat(self.default_region))
+        region_offsets = map(mul, regions, repeat(self._stride))
+        band_offsets = map(mul, map(bisect_right, repeat(bounds), weights), repeat(2))
+        speed_offsets = map(add, map(bool, express_flags), repeat(-2))
+        indexes = map(add, map(add, region_offsets, band_offsets), speed_offsets)
+        return array("d", map(self.rates.__getitem__, indexes))
+
+# ----------------------------------------------------------------------------
+# 2. Loading Tables from CSV
+# ----------------------------------------------------------------------------
+
+def load_rate_table(rates_path, regions_path, default_region="international"):
+    """Load a RateTable from CSV files.
+
+    rates_path has the header region,min_weight,standard,express and one
+    row per weight band. regions_path has the header country,region.
+
+    Returns:
+        RateTable: The compiled table
+    """
+    rates = {}
+    with open(rates_path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            rates.setdefault(row["region"], []).append(
+                (float(row["min_weight"]), float(row["standard"]), float(row["express"])))
+    with open(regions_path, newline="", encoding="utf-8") as file:
+        country_regions = {row["country"]: row["region"] for row in csv.DictReader(file)}
+    return RateTable(rates, country_regions, default_region)
+
+# The same rates as calculate_shipping_best: light is under 1 kg
+DEFAULT_RATES = RateTable(
+    rates={
+        "domestic": [(0, 5.0, 15.0), (1, 10.0, 25.0)],
+        "neighboring": [(0, 8.0, 20.0), (1, 15.0, 35.0)],
+        "international": [(0, 15.0, 40.0), (1, 30.0, 60.0)],
+    },
+    country_regions={"USA": "domestic", "Canada": "neighboring", "Mexico": "neighboring"},
+    default_region="international",
+)
+
+def calculate_shipping(country, weight, express):
+    """Drop-in replacement for calculate_shipping_best.
+
+    Like the original, any weight under 1 kg is light, negative ones
+    included, so weights are clamped to the lightest band instead of
+    raising as RateTable.quote() does.
+    """
+    return DEFAULT_RATES.quote(country, max(weight, 0), express)
+
+# ----------------------------------------------------------------------------
+# 3. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    import time
+
+    print(f"USA, 0.5 kg, express: ${calculate_shipping('USA', 0.5, True)}")      # $15.0
+    print(f"Canada, 3 kg, standard: ${calculate_shipping('Canada', 3, False)}")  # $15.0
+    print(f"Japan, 2 kg, express: ${calculate_shipping('Japan', 2, True)}")      # $60.0
+
+    def calculate_shipping_best(country, weight, express):
+        """The version from 06_nested_conditionals.py."""
+        if country == "USA":
+            region = "domestic"
+        elif country in ["Canada", "Mexico"]:
+            region = "neighboring"
+        else:
+            region = "international"
+        weight_category = "light" if weight < 1 else "heavy"
+        speed = "express" if express else "standard"
+        shipping_rates = {
+            "domestic": {"light": {"standard": 5.0, "express": 15.0},
+                         "heavy": {"standard": 10.0, "express": 25.0}},
+            "neighboring": {"light": {"standard": 8.0, "express": 20.0},
+                            "heavy": {"standard": 15.0, "express": 35.0}},
+            "international": {"light": {"standard": 15.0, "express": 40.0},
+                              "heavy": {"standard": 30.0, "express": 60.0}},
+        }
+        return shipping_rates[region][weight_category][speed]
+
+    count = 1_000_000
+    countries = random.choices(["USA", "Canada", "Mexico", "Japan", "France"], k=count)
+    weights = array("d", (random.uniform(0.1, 10) for _ in range(count)))
+    express = bytes(random.getrandbits(1) for _ in range(count))
+
+    start = time.perf_counter()
+    expected = [calculate_shipping_best(c, w, e) for c, w, e in zip(countries, weights, express)]
+    nested_time = time.perf_counter() - start
+    start = time.perf_counter()
+    prices = DEFAULT_RATES.quote_many(countries, weights, express)
+    bulk_time = time.perf_counter() - start
+    print(f"\n{count:,} parcels: nested dicts {nested_time:.2f}s, quote_many {bulk_time:.2f}s")
+    print(f"Same prices: {list(prices) == expected}")
+
+    # Arbitrary weight bands loaded from CSV
+    with tempfile.TemporaryDirectory() as folder:
+        rates_path = os.path.join(folder, "rates.csv")
+        regions_path = os.path.join(folder, "regions.csv")
+        with open(rates_path, "w", encoding="utf-8") as file:
+            file.write("region,min_weight,standard,express\n"
+                       "domestic,0,5,15\ndomestic,1,10,25\ndomestic,5,18,40\ndomestic,20,45,90\n"
+                       "europe,0,12,30\neurope,2,22,50\n"
+                       "international,0,15,40\ninternational,1,30,60\n")
+        with open(regions_path, "w", encoding="utf-8") as file:
+            file.write("country,region\nUSA,domestic\nFrance,europe\nGermany,europe\n")
+        table = load_rate_table(rates_path, regions_path)
+        print(f"\nBands (kg): {table.bounds}")
+        for country, weight in [("USA", 7), ("USA", 25), ("France", 1.5), ("Germany", 3), ("Japan", 3)]:
+            print(f"  {country:8} {weight:>4} kg -> {table.region_of(country):13} "
+                  f"${table.quote(country, weight):.2f}")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Build lookup tables once; never rebuild them inside the function
+# - Flatten nested dicts into one array indexed by small integer codes
+# - bisect handles any number of weight bands without new conditionals
+# - map() over columns prices millions of parcels without a loop body
+# - Keep rates in CSV so they can change without a code change
+# ============================================================================
@@ -0,0 +1,272 @@
+# ============================================================================
+# FILENAME: 19_credential_store.py
+# DESCRIPTION: Demonstrates salted password hashing, constant-time checks,
+#              session tokens and non-blocking verification with asyncio
+# ============================================================================
+
+"""
+authenticate_user in 07_logical_expressions_in_conditionals.py rebuilds its
+users dict on every call and compares plaintext passwords with !=. Real
+systems never store passwords: they store a salted, deliberately slow hash
+(PBKDF2 or scrypt), so a stolen database is expensive to crack.
+
+That slowness (tens of milliseconds per check, by design) creates new
+problems, which this module solves:
+- Hashing is done by hashlib.pbkdf2_hmac / hashlib.scrypt. Both run in C
+  and release the GIL, so a thread pool can verify several logins at once
+  without blocking an asyncio event loop
+- Hashes and 2FA codes are compared with hmac.compare_digest, whose running
+  time does not reveal how many leading characters matched
+- Unknown usernames are still checked against a dummy hash, so response
+  time does not reveal which usernames exist
+- A successful login returns a random session token. Later requests present
+  the token, which is one dict lookup, instead of paying for the hash again
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------------------------------------------------------------
+# 1. Password Hashing
+# ----------------------------------------------------------------------------
+
+PBKDF2_ITERATIONS = 200_000
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+def hash_password(password, scheme="pbkdf2_sha256", salt=None, iterations=PBKDF2_ITERATIONS):
+    """Hash a password with a random salt.
+
+    The result records the scheme and its parameters, so stored hashes can
+    still be verified after the defaults change:
+        pbkdf2_sha256$200000$<salt>$<hash>
+        scrypt$16384$8$1$<salt>$<hash>
+
+    Args:
+        password (str): The plaintext password
+        scheme (str, optional): "pbkdf2_sha256" or "scrypt"
+        salt (bytes, optional): Defaults to 16 random bytes
+        iterations (int, optional): PBKDF2 iteration count
+
+    Returns:
+        str: The encoded hash
+    """
+    salt = os.urandom(16) if salt is None else salt
+    if scheme == "pbkdf2_sha256":
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+        return f"pbkdf2_sha256${iterations}${_b64(salt)}${_b64(digest)}"
+    if scheme == "scrypt":
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+        return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+    raise ValueError(f"Unknown hashing scheme: {scheme}")
+
+def verify_password(password, encoded):
+    """Check a password against an encoded hash in constant time."""
+    scheme, *params, salt, expected = encoded.split("$")
+    salt, expected = base64.b64decode(salt), base64.b64decode(expected)
+    if scheme == "pbkdf2_sha256":
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, int(params[0]))
+    elif scheme == "scrypt":
+        n, r, p = map(int, params)
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p)
+    else:
+        raise ValueError(f"Unknown hashing scheme: {scheme}")
+    return hmac.compare_digest(digest, expected)
+
+# ----------------------------------------------------------------------------
+# 2. The Credential Store and Session Cache
+# ----------------------------------------------------------------------------
+
+class Credential:
+    """What is stored per user: never the password itself."""
+
+    __slots__ = ("password_hash", "two_factor_code")
+
+    def __init__(self, password_hash, two_factor_code=None):
+        self.password_hash = password_hash
+        self.two_factor_code = two_factor_code
+
+class CredentialStore:
+    """Username -> Credential, built once and shared by every request."""
+
+    def __init__(self, **hash_options):
+        self._users = {}
+        self._hash_options = hash_options
+        # Verified for unknown usernames so they take as long as real ones
+        self._dummy_hash = hash_password(secrets.token_hex(8), **hash_options)
+
+    def add_user(self, username, password, two_factor_code=None):
+        if username in self._users:
+            raise ValueError(f"User {username!r} already exists")
+        self._users[username] = Credential(hash_password(password, **self._hash_options),
+                                           two_factor_code)
+
+    def check(self, username, password):
+        """Verify a password; always does exactly one hash.
+
+        Returns:
+            Credential or None: The user's credential if the password is right
+        """
+        credential = self._users.get(username)
+        encoded = credential.password_hash if credential else self._dummy_hash
+        if verify_password(password, encoded) and credential is not None:
+            return credential
+        return None
+
+class SessionCache:
+    """Short-lived session tokens, bounded in number (oldest evicted first)."""
+
+    def __init__(self, ttl=900.0, capacity=100_000, clock=time.monotonic):
+        self.ttl = ttl
+        self.capacity = capacity
+        self.clock = clock
+        self._sessions = OrderedDict()  # token -> (username, expires_at)
+
+    def create(self, username):
+        token = secrets.token_urlsafe(32)
+        self._sessions[token] = (username, self.clock() + self.ttl)
+        if len(self._sessions) > self.capacity:
+            self._sessions.popitem(last=False)
+        return token
+
+    def lookup(self, token):
+        """Return the session's username, or None if unknown or expired."""
+        session = self._sessions.get(token)
+        if session is None:
+            return None
+        if session[1] < self.clock():
+            self._sessions.pop(token, None)
+            return None
+        return session[0]
+
+    def revoke(self, token):
+        self._sessions.pop(token, None)
+
+# ----------------------------------------------------------------------------
+# 3. The Async Authentication Service
+# ----------------------------------------------------------------------------
+
+AuthResult = namedtuple("AuthResult", ["success", "message", "token"])
+
+class AuthService:
+    """Logins for an asyncio server: hashing runs on a thread pool.
+
+    Attributes:
+        store (CredentialStore): The users
+        sessions (SessionCache): Tokens from successful logins
+    """
+
+    def __init__(self, store, sessions=None, workers=4):
+        self.store = store
+        self.sessions = sessions or SessionCache()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auth")
+
+    async def authenticate_user(self, username, password, two_factor_code=None):
+        """Check credentials without blocking the event loop.
+
+        Failed passwords and unknown usernames get the same message, so an
+        attacker cannot use it to discover which usernames exist.
+
+        Returns:
+            AuthResult: success, message and, on success, a session token
+        """
+        loop = asyncio.get_running_loop()
+        credential = await loop.run_in_executor(self._executor, self.store.check, username, password)
+        if credential is None:
+            return AuthResult(False, "Invalid username or password", None)
+        if credential.two_factor_code is not None:
+            if not two_factor_code:
+                return AuthResult(False, "Two-factor authentication required", None)
+            if not hmac.compare_digest(two_factor_code.encode(), credential.two_factor_code.encode()):
+                return AuthResult(False, "Invalid two-factor code", None)
+        return AuthResult(True, f"Welcome, {username}!", self.sessions.create(username))
+
+    def authenticate_token(self, token):
+        """Check a session token: one dict lookup, no hashing."""
+        username = self.sessions.lookup(token)
+        if username is None:
+            return AuthResult(False, "Session expired or invalid", None)
+        return AuthResult(True, f"Welcome back, {username}!", token)
+
+    def close(self):
+        self._executor.shutdown()
+
+# ----------------------------------------------------------------------------
+# 4. Demonstration and Benchmark
+# ----------------------------------------------------------------------------
+
+async def _measure_loop_lag(stop, interval=0.005):
+    """Return the worst delay seen by a task that wakes every `interval` seconds."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+async def main():
+    store = CredentialStore()
+    store.add_user("admin", "admin123", two_factor_code="123456")
+    store.add_user("user1", "pass123")
+    store.add_user("guest", "guest")
+    service = AuthService(store)
+
+    attempts = [("nonexistent", "password", None), ("admin", "wrongpassword", None),
+                ("admin", "admin123", None), ("admin", "admin123", "wrong"),
+                ("admin", "admin123", "123456"), ("user1", "pass123", None)]
+    token = None
+    for username, password, code in attempts:
+        result = await service.authenticate_user(username, password, code)
+        print(f"Login attempt for '{username}': {result.message}")
+        token = result.token or token
+    print(f"Token login: {service.authenticate_token(token).message}")
+
+    # Sustained logins: the thread pool keeps the event loop responsive
+    logins = 24
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_loop_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(service.authenticate_user("user1", "pass123") for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lag = await lag_task
+    print(f"\n{logins} password logins: {logins / elapsed:.1f}/s "
+          f"(on {os.cpu_count()} CPU core(s)), worst event-loop delay {lag * 1000:.0f} ms")
+
+    # The same logins hashed directly on the event loop thread
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_loop_lag(stop))
+    await asyncio.sleep(0)
+    for _ in range(logins // 4):
+        store.check("user1", "pass123")
+    stop.set()
+    print(f"Hashing on the loop thread instead: worst delay "
+          f"{await lag_task * 1000:.0f} ms (nothing else runs while hashing)")
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        service.authenticate_token(token)
+    print(f"Token checks: {100_000 / (time.perf_counter() - start):,.0f}/s")
+    service.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Store salted, slow hashes (PBKDF2/scrypt), never passwords
+# - Compare secrets with hmac.compare_digest, not == or !=
+# - Spend the same time on unknown usernames to avoid leaking them
+# - hashlib releases the GIL, so a thread pool verifies logins in parallel
+# - run_in_executor keeps slow work off the asyncio event loop
+# - Session tokens let repeat requests skip the expensive hash entirely
+# ============================================================================
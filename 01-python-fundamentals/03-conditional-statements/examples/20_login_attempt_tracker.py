@@ -0,0 +1,422 @@
+# ============================================================================
+# FILENAME: 20_login_attempt_tracker.py
+# DESCRIPTION: Demonstrates throttling failed logins per username and IP with
+#              sliding-window counters, exponential lockout and a shared store
+# ============================================================================
+
+"""
+login() in 07_logical_expressions_in_conditionals.py and the password loop
+in 02-control-flow/01-while-loop/examples/03_while_else.py count attempts
+in a local variable. The count starts over on every call, so an attacker
+can simply make a new request, and several server processes never see each
+other's counts.
+
+This module keeps a shared record of failures:
+- Failures are counted per key, where a key is a username ("user:alice")
+  or an IP address ("ip:10.0.0.7"), so both guessing one account and
+  spraying many accounts from one address are caught
+- Each key uses a sliding-window counter that needs O(1) memory and time:
+  the counts of the current and the previous fixed window, with the
+  previous one weighted by how much of it still overlaps the sliding window
+- Going over the limit locks the key. Every repeat lockout doubles the
+  lock time ("exponential lockout"), up to a cap
+- The number of keys is bounded. Keys that are locked or have strikes
+  are kept apart from the others, so a flood of new keys evicts only keys
+  without a penalty (least recently used first) and cannot lift a lock
+- SqliteAttemptTracker keeps the same state in a local sqlite file, so
+  several worker processes on one machine share it
+- check() is a dict (or index) lookup, cheap enough to run before every
+  password hash, which is exactly when it is needed
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from itertools import islice
+
+# ----------------------------------------------------------------------------
+# 1. The Counter Algorithm
+# ----------------------------------------------------------------------------
+
+# window_start: start of the current fixed window
+# previous, current: failures in the previous and current fixed windows
+# locked_until: time the lock ends (0 when not locked)
+# strikes: number of lockouts so far, which sets the next lock's length
+AttemptState = namedtuple("AttemptState",
+                          ["window_start", "previous", "current", "locked_until", "strikes"])
+
+Decision = namedtuple("Decision", ["allowed", "retry_after"])
+
+class ThrottlePolicy:
+    """The limits shared by every tracker.
+
+    Attributes:
+        max_failures (int): Failures allowed within one window
+        window (float): Sliding window length in seconds
+        base_lockout (float): First lockout length in seconds
+        max_lockout (float): Longest possible lockout
+        strike_reset (float): Idle seconds after which strikes are forgotten
+    """
+
+    def __init__(self, max_failures=5, window=300.0, base_lockout=60.0,
+                 max_lockout=3600.0, strike_reset=86_400.0):
+        self.max_failures = max_failures
+        self.window = window
+        self.base_lockout = base_lockout
+        self.max_lockout = max_lockout
+        self.strike_reset = strike_reset
+
+    def new_state(self, now):
+        return AttemptState(now, 0, 0, 0.0, 0)
+
+    def roll(self, state, now):
+        """Move the fixed windows forward to `now`."""
+        window_start, previous, current, locked_until, strikes = state
+        passed = int((now - window_start) // self.window)
+        if passed >= 1:
+            previous = current if passed == 1 else 0
+            current = 0
+            window_start += passed * self.window
+        if strikes and now > max(locked_until, window_start) + self.strike_reset:
+            strikes = 0
+        return AttemptState(window_start, previous, current, locked_until, strikes)
+
+    def estimate(self, state, now):
+        """Failures in the last `window` seconds (weighted approximation)."""
+        overlap = 1 - (now - state.window_start) / self.window
+        return state.previous * overlap + state.current
+
+    def fail(self, state, now):
+        """Return the state after one more failure (possibly locking the key)."""
+        state = self.roll(state, now)
+        if state.locked_until > now:
+            return state  # attempts during a lock were refused; don't count them
+        state = state._replace(current=state.current + 1)
+        if self.estimate(state, now) >= self.max_failures:
+            strikes = state.strikes + 1
+            lockout = min(self.base_lockout * 2 ** min(strikes - 1, 30), self.max_lockout)
+            # The counts start over once the lock is in place
+            state = AttemptState(now, 0, 0, now + lockout, strikes)
+        return state
+
+    def is_idle(self, state, now):
+        """True when forgetting the key would change nothing."""
+        state = self.roll(state, now)
+        return state.locked_until <= now and not state.previous and not state.current and not state.strikes
+
+    def is_penalized(self, state, now):
+        """True while the key is locked or has strikes that raise its next lock."""
+        return state.locked_until > now or state.strikes > 0
+
+# ----------------------------------------------------------------------------
+# 2. In-Memory Tracker (one process, many threads)
+# ----------------------------------------------------------------------------
+
+class AttemptTracker:
+    """Failed-login tracking per username and IP, in memory.
+
+    Keys are stored in two LRU tables. Keys that are locked or have
+    strikes ("penalized") live in their own table, so new keys can only
+    push out keys that carry no penalty. When the penalized table itself
+    is full, a key whose lock has ended goes first; a running lock is
+    dropped only if the oldest entries are all still locked.
+
+    Attributes:
+        policy (ThrottlePolicy): The limits
+        max_keys (int): Keys without a penalty kept before the least
+            recently used ones are evicted
+        max_locked (int): Penalized keys kept (default: max_keys)
+    """
+
+    # Penalized keys looked at per eviction, so one eviction stays O(1)
+    EVICTION_SCAN = 64
+
+    def __init__(self, policy=None, max_keys=100_000, clock=time.monotonic, max_locked=None):
+        self.policy = policy or ThrottlePolicy()
+        self.max_keys = max_keys
+        self.max_locked = max_keys if max_locked is None else max_locked
+        self.clock = clock
+        self._states = OrderedDict()     # key -> AttemptState, least recently used first
+        self._penalized = OrderedDict()  # the same, for locked keys or keys with strikes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def keys_for(username, ip):
+        return (f"user:{username}", f"ip:{ip}")
+
+    def __len__(self):
+        return len(self._states) + len(self._penalized)
+
+    # --- storage hooks (overridden by SqliteAttemptTracker) ------------------
+
+    def _locked_until(self, keys):
+        # No lock: a single dict.get is atomic, and a stale answer is harmless.
+        # Only penalized keys can be locked
+        best = 0.0
+        for key in keys:
+            state = self._penalized.get(key)
+            if state is not None and state.locked_until > best:
+                best = state.locked_until
+        return best
+
+    def _record(self, keys, now):
+        policy = self.policy
+        with self._lock:
+            states, penalized = self._states, self._penalized
+            for key in keys:
+                state = penalized.pop(key, None) or states.pop(key, None) or policy.new_state(now)
+                state = policy.fail(state, now)
+                # Re-inserting puts the key at the most recently used end
+                if policy.is_penalized(state, now):
+                    penalized[key] = state
+                else:
+                    states[key] = state
+            # Lazily drop the oldest key of each table if it no longer matters
+            for table in (states, penalized):
+                if table:
+                    oldest = next(iter(table))
+                    if policy.is_idle(table[oldest], now):
+                        del table[oldest]
+            # Keys without a penalty can go at any time
+            while len(states) > self.max_keys:
+                states.popitem(last=False)
+            while len(penalized) > self.max_locked:
+                self._evict_penalized(now)
+
+    def _evict_penalized(self, now):
+        """Drop one penalized key, preferring one whose lock has ended."""
+        penalized = self._penalized
+        for key in islice(penalized, self.EVICTION_SCAN):
+            if penalized[key].locked_until <= now:
+                del penalized[key]
+                return
+        penalized.popitem(last=False)
+
+    def _clear(self, key):
+        with self._lock:
+            self._states.pop(key, None)
+            self._penalized.pop(key, None)
+
+    # --- public API ----------------------------------------------------------
+
+    def check(self, username, ip):
+        """Is a login attempt allowed right now? Call before hashing.
+
+        Returns:
+            Decision: allowed, and seconds to wait when it is not
+        """
+        now = self.clock()
+        locked_until = self._locked_until(self.keys_for(username, ip))
+        if locked_until > now:
+            return Decision(False, locked_until - now)
+        return Decision(True, 0.0)
+
+    def record_failure(self, username, ip):
+        self._record(self.keys_for(username, ip), self.clock())
+
+    def record_success(self, username, ip):
+        """Clear the account's failures. The IP's record is kept, so an
+        address guessing many accounts is still counted."""
+        self._clear(self.keys_for(username, ip)[0])
+
+# ----------------------------------------------------------------------------
+# 3. Sqlite Tracker (shared by processes on one machine)
+# ----------------------------------------------------------------------------
+
+class SqliteAttemptTracker(AttemptTracker):
+    """The same tracker with its state in a local sqlite file.
+
+    Every process opens its own connection to the same file. WAL mode lets
+    readers run while one writer updates, and BEGIN IMMEDIATE makes each
+    read-modify-write of a failure atomic across processes.
+    """
+
+    def __init__(self, path, policy=None, max_keys=100_000, clock=time.time, max_locked=None):
+        # Wall-clock time: monotonic clocks are not comparable across processes
+        super().__init__(policy, max_keys, clock, max_locked)
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS attempts (
+                key TEXT PRIMARY KEY, window_start REAL, previous INTEGER,
+                current INTEGER, locked_until REAL, strikes INTEGER, touched REAL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS attempts_touched ON attempts (touched)")
+        self._writes = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM attempts").fetchone()[0]
+
+    def _locked_until(self, keys):
+        with self._lock:
+            row = self._db.execute("SELECT MAX(locked_until) FROM attempts WHERE key IN (?, ?)",
+                                   keys).fetchone()
+        return row[0] or 0.0
+
+    def _record(self, keys, now):
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                for key in keys:
+                    row = db.execute("SELECT window_start, previous, current, locked_until, strikes "
+                                     "FROM attempts WHERE key = ?", (key,)).fetchone()
+                    state = AttemptState(*row) if row else self.policy.new_state(now)
+                    db.execute("INSERT OR REPLACE INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (key, *self.policy.fail(state, now), now))
+                self._writes += 1
+                if self._writes % 1_000 == 0:
+                    self._evict(now)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def _evict(self, now):
+        """Drop idle keys, then keep max_keys plain and max_locked penalized keys.
+
+        As in memory, keys without a penalty are evicted least recently
+        touched first. Penalized keys over max_locked go with ended locks
+        first, so a flood of new keys cannot lift a running lock.
+        """
+        policy = self.policy
+        self._db.execute(
+            "DELETE FROM attempts WHERE locked_until <= ? AND touched < ? "
+            "AND (strikes = 0 OR touched < ?)",
+            (now, now - 2 * policy.window, now - policy.strike_reset))
+        self._db.execute(
+            "DELETE FROM attempts WHERE key IN (SELECT key FROM attempts "
+            "WHERE locked_until <= ? AND strikes = 0 "
+            "ORDER BY touched DESC LIMIT -1 OFFSET ?)", (now, self.max_keys))
+        self._db.execute(
+            "DELETE FROM attempts WHERE key IN (SELECT key FROM attempts "
+            "WHERE locked_until > ? OR strikes > 0 "
+            "ORDER BY locked_until > ? DESC, touched DESC LIMIT -1 OFFSET ?)",
+            (now, now, self.max_locked))
+
+    def _clear(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM attempts WHERE key = ?", (key,))
+
+    def close(self):
+        self._db.close()
+
+# ----------------------------------------------------------------------------
+# 4. Guarding a Login
+# ----------------------------------------------------------------------------
+
+def guarded_login(tracker, username, password, ip, verify):
+    """Log in with throttling, like login() in 07 but with a shared record.
+
+    Args:
+        tracker (AttemptTracker): Where failures are recorded
+        username (str): The username
+        password (str): The password
+        ip (str): The client's address
+        verify (callable): verify(username, password) -> bool, the
+            expensive password check
+
+    Returns:
+        tuple: (success, message)
+    """
+    decision = tracker.check(username, ip)
+    if not decision.allowed:
+        return (False, f"Too many failed attempts. Try again in {decision.retry_after:.0f}s")
+    if verify(username, password):
+        tracker.record_success(username, ip)
+        return (True, f"Welcome, {username}!")
+    tracker.record_failure(username, ip)
+    return (False, "Invalid username or password")
+
+# ----------------------------------------------------------------------------
+# 5. Demonstration
+# ----------------------------------------------------------------------------
+
+def _hammer(args):
+    """Worker process: fail logins for one account through the shared file."""
+    path, attempts = args
+    tracker = SqliteAttemptTracker(path)
+    allowed = 0
+    for _ in range(attempts):
+        if tracker.check("admin", "203.0.113.9").allowed:
+            allowed += 1
+            tracker.record_failure("admin", "203.0.113.9")
+    tracker.close()
+    return allowed
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from multiprocessing import Pool
+
+    passwords = {"admin": "admin123", "user1": "pass123"}
+    verify = lambda username, password: passwords.get(username) == password
+
+    class FakeClock:
+        """A clock the demo can move forward by hand."""
+        def __init__(self):
+            self.now = 0.0
+        def __call__(self):
+            return self.now
+
+    clock = FakeClock()
+    tracker = AttemptTracker(ThrottlePolicy(max_failures=3, window=60, base_lockout=30), clock=clock)
+    for round_number in range(1, 4):
+        for _ in range(4):
+            success, message = guarded_login(tracker, "admin", "guess", "10.0.0.7", verify)
+            clock.now += 1
+        print(f"Round {round_number}: {message}")
+        clock.now += 30 * 2 ** (round_number - 1)  # wait out the lock
+    # The lock doubles each round: 30s, 60s, 120s
+    print(guarded_login(tracker, "admin", "admin123", "10.0.0.7", verify))
+
+    # Cost of the pre-hash check
+    tracker = AttemptTracker()
+    start = time.perf_counter()
+    for i in range(200_000):
+        tracker.check("user1", "10.0.0.8")
+    print(f"\nIn-memory check: {200_000 / (time.perf_counter() - start):,.0f}/s")
+
+    # Memory stays bounded while 300,000 different addresses fail once each
+    tracker = AttemptTracker(max_keys=50_000)
+    for i in range(300_000):
+        tracker.record_failure("user1", f"10.{i >> 16}.{i >> 8 & 255}.{i & 255}")
+    print(f"Keys kept after 300,000 IPs: {len(tracker):,}")
+
+    # Creating new keys cannot push out a running lock
+    tracker = AttemptTracker(ThrottlePolicy(max_failures=3), max_keys=100)
+    for _ in range(3):
+        tracker.record_failure("admin", "198.51.100.1")
+    for i in range(60):
+        tracker.record_failure(f"user{i}", f"198.51.100.{i + 2}")
+    print(f"admin still locked after 60 new keys: {not tracker.check('admin', '10.0.0.9').allowed}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "attempts.sqlite3")
+        shared = SqliteAttemptTracker(path)
+        start = time.perf_counter()
+        for i in range(20_000):
+            shared.check("user1", "10.0.0.8")
+        print(f"Sqlite check: {20_000 / (time.perf_counter() - start):,.0f}/s")
+
+        # Four processes attack one account at once; the shared record means
+        # they get max_failures tries between them, not each
+        with Pool(4) as pool:
+            allowed = pool.map(_hammer, [(path, 50)] * 4)
+        print(f"Failures allowed across 4 processes: {sum(allowed)} "
+              f"(limit {shared.policy.max_failures})")
+        shared.close()
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Keep attempt counts outside the request so they survive between calls
+# - Track both the username and the IP address
+# - Two fixed windows give an O(1) sliding-window estimate
+# - Double the lockout on every repeat offence, up to a cap
+# - Bound memory with LRU eviction, keeping locked keys apart so they survive
+# - A local sqlite file (WAL mode, BEGIN IMMEDIATE) shares state between processes
+# - Check the throttle before the expensive password hash
+# ============================================================================
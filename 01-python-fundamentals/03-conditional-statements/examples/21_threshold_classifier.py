@@ -0,0 +1,299 @@
+# ============================================================================
+# FILENAME: 21_threshold_classifier.py
+# DESCRIPTION: Demonstrates turning if/elif threshold ladders into a reusable,
+#              table-driven classifier using bisect and lookup tables
+# ============================================================================
+
+"""
+The same ladder of comparisons is written by hand in several places:
+get_passing_grade (02_if_only.py), get_grade and evaluate_score
+(05_ternary_expressions.py), classify_grade (04-functions/.../
+03_return_values.py) and the letter_grades comprehension
+(03-data-structures/.../03_dictionary_comprehensions.py):
+
+    if score >= 90: "A"  elif score >= 80: "B"  elif ...  else: "F"
+
+Each value walks the ladder from the top, and each copy must be kept in
+sync by hand. This module describes a ladder once, as data:
+- A ThresholdClassifier is built from (cutoff, label) pairs. The cutoffs
+  are kept sorted, so bisect finds a value's band in O(log k) comparisons
+- Labels are numbered ("label codes"); classify_many returns one code per
+  value as bytes, computed with map() in C
+- For integer domains such as 0-100 scores, every answer can be computed
+  up front into a lookup table. Classifying is then one index per value,
+  and scores stored as bytes are classified by bytes.translate() in a
+  single C call
+- NaN fails every comparison, so the if/elif ladders give it their final
+  else label. bisect would put it in the top band instead, so NaN is
+  checked for explicitly and gets the default label
+"""
+
+import math
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from itertools import repeat
+from operator import ne
+
+# ----------------------------------------------------------------------------
+# 1. The Classifier
+# ----------------------------------------------------------------------------
+
+class ThresholdClassifier:
+    """Maps numbers to labels with a sorted table of cutoffs.
+
+    A value gets the label of the highest cutoff it reaches (value >=
+    cutoff), or `default` if it is below every cutoff. NaN gets `default`,
+    as it does in an if/elif ladder where every comparison is False.
+
+    Attributes:
+        cutoffs (list): Sorted cutoffs
+        labels (tuple): Label per code; code 0 is the default label
+    """
+
+    def __init__(self, table, default, minimum=None, maximum=None, invalid=None):
+        """Build the classifier.
+
+        Args:
+            table (iterable): (cutoff, label) pairs, in any order
+            default (str): Label for values below every cutoff
+            minimum (number, optional): Values below this get `invalid`
+            maximum (number, optional): Values above this get `invalid`
+            invalid (str, optional): Label for out-of-range values
+
+        Raises:
+            ValueError: If two entries share a cutoff
+        """
+        pairs = sorted(table)
+        if len({cutoff for cutoff, _ in pairs}) != len(pairs):
+            raise ValueError("cutoffs must be unique")
+        if (minimum is not None or maximum is not None) and invalid is None:
+            raise ValueError("an `invalid` label is needed with minimum/maximum")
+
+        # Out-of-range values become two more bands at the ends of the table
+        cutoffs = [cutoff for cutoff, _ in pairs]
+        labels = [default] + [label for _, label in pairs]
+        if minimum is not None:
+            cutoffs.insert(0, minimum)
+            labels.insert(0, invalid)
+        if maximum is not None:
+            cutoffs.append(math.nextafter(maximum, math.inf))
+            labels.append(invalid)
+
+        self.cutoffs = cutoffs
+        self.labels = tuple(labels)
+        self.minimum = minimum
+        self.maximum = maximum
+        self._codes = {label: code for code, label in reversed(list(enumerate(self.labels)))}
+        self._default_code = 0 if minimum is None else 1
+        if len(self.labels) > 256:
+            raise ValueError("at most 256 labels (codes are stored as bytes)")
+
+    def code(self, value):
+        """Return the label code for one value."""
+        if value != value:  # NaN
+            return self._default_code
+        return bisect_right(self.cutoffs, value)
+
+    def classify(self, value):
+        """Return the label for one value."""
+        return self.labels[self.code(value)]
+
+    def __call__(self, value):
+        return self.labels[self.code(value)]
+
+    def code_of(self, label):
+        """The code of a label (the first one, if a label appears twice)."""
+        return self._codes[label]
+
+    def classify_many(self, values):
+        """Return one label code per value, as bytes, in one pass.
+
+        Args:
+            values (iterable): Numbers, e.g. an array('d') or array('i')
+
+        Returns:
+            bytes: Code per value; self.labels[code] is the label
+        """
+        if not isinstance(values, Sequence):
+            values = list(values)  # read twice below
+        # x != x only for NaN; the check is one more pass in C
+        if any(map(ne, values, values)):
+            return bytes(map(self.code, values))
+        return bytes(map(bisect_right, repeat(self.cutoffs), values))
+
+    def labels_for(self, codes):
+        """Turn codes back into labels (a list of shared label strings)."""
+        return list(map(self.labels.__getitem__, codes))
+
+    def counts(self, codes):
+        """Return {label: number of values} for codes from classify_many.
+
+        Labels that occur in several bands (like an invalid label at both
+        ends) are added together.
+        """
+        totals = dict.fromkeys(self.labels, 0)
+        for code, label in enumerate(self.labels):
+            totals[label] += codes.count(code)
+        return totals
+
+    def integer_table(self, low, high):
+        """Precompute the codes of every integer from low to high.
+
+        Returns:
+            IntegerTable: Index-based classifier for that domain
+        """
+        return IntegerTable(self, low, high)
+
+# ----------------------------------------------------------------------------
+# 2. Precomputed Tables for Integer Domains
+# ----------------------------------------------------------------------------
+
+INTEGER_TYPECODES = frozenset("bBhHiIlLqQ")
+
+class IntegerTable:
+    """Every answer for the integers low..high, computed once.
+
+    Values that are not ints, or lie outside low..high, are classified by
+    the classifier's bisect, so every method gives the answer classify()
+    of the classifier would.
+
+    Attributes:
+        table (bytes): table[value - low] is the value's label code
+    """
+
+    def __init__(self, classifier, low, high):
+        if high < low:
+            raise ValueError("high must not be below low")
+        self.classifier = classifier
+        self.labels = classifier.labels
+        self.low = low
+        self.high = high
+        self.table = classifier.classify_many(range(low, high + 1))
+        # A full 256-entry table for bytes.translate, when the domain fits in a byte
+        if 0 <= low and high <= 255:
+            self._translate = classifier.classify_many(range(256))
+        else:
+            self._translate = None
+
+    def classify(self, value):
+        """Return the label for one value."""
+        if type(value) is not int or not self.low <= value <= self.high:
+            return self.classifier.classify(value)
+        return self.labels[self.table[value - self.low]]
+
+    def classify_many(self, values):
+        """Return one code per value, as bytes.
+
+        bytes, bytearray and array('B') input (every value 0-255) takes the
+        translate() fast path. Its 256-entry table holds the classifier's
+        answer for every byte, so bytes outside low..high get the same code
+        as classify() gives them. Other input uses the table only if every
+        value is an int inside low..high; anything else (floats, NaN,
+        values out of range) falls back to the classifier's bisect.
+        """
+        if self._translate is not None:
+            if isinstance(values, (bytes, bytearray)):
+                return values.translate(self._translate)
+            if isinstance(values, array) and values.typecode == "B":
+                return values.tobytes().translate(self._translate)
+        if isinstance(values, array):
+            integers = values.typecode in INTEGER_TYPECODES
+        elif isinstance(values, range):
+            integers = True
+        else:
+            if not isinstance(values, Sequence):
+                values = list(values)  # read more than once below
+            integers = set(map(type, values)) <= {int}
+        if not integers or (values and (min(values) < self.low or max(values) > self.high)):
+            return self.classifier.classify_many(values)
+        if self.low == 0:
+            return bytes(map(self.table.__getitem__, values))
+        return bytes(map(self.table.__getitem__, map(int.__sub__, values, repeat(self.low))))
+
+# ----------------------------------------------------------------------------
+# 3. The Ladders from the Other Examples
+# ----------------------------------------------------------------------------
+
+# get_passing_grade, get_grade, classify_grade and letter_grades
+LETTER_GRADES = ThresholdClassifier([(90, "A"), (80, "B"), (70, "C"), (60, "D")], default="F")
+
+# evaluate_score, including its "Invalid Score" check for 0-100
+SCORE_EVALUATION = ThresholdClassifier(
+    [(90, "High Pass"), (70, "Pass"), (60, "Conditional Pass")], default="Fail",
+    minimum=0, maximum=100, invalid="Invalid Score")
+
+LETTER_GRADE_TABLE = LETTER_GRADES.integer_table(0, 100)
+
+def get_grade(score):
+    """Letter grade for a score, like get_grade in 05_ternary_expressions.py."""
+    return LETTER_GRADES(score)
+
+def evaluate_score(score):
+    """Like evaluate_score in 05_ternary_expressions.py."""
+    return SCORE_EVALUATION(score)
+
+# ----------------------------------------------------------------------------
+# 4. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    for score in [95, 82, 71, 65, 50, 89.5, math.nan]:
+        print(f"Score: {score} -> Grade: {get_grade(score)}")
+    print([evaluate_score(s) for s in (-5, 55, 60, 75, 100, 100.5, math.nan)])
+    # ['Invalid Score', 'Fail', 'Conditional Pass', 'Pass', 'High Pass', 'Invalid Score', 'Fail']
+
+    student_grades = {"Alice": 92, "Bob": 85, "Charlie": 78, "David": 96, "Eve": 64}
+    codes = LETTER_GRADES.classify_many(student_grades.values())
+    print(dict(zip(student_grades, LETTER_GRADES.labels_for(codes))))
+
+    def get_grade_ladder(score):
+        """The if/elif version from 05_ternary_expressions.py."""
+        if score >= 90:
+            return "A"
+        elif score >= 80:
+            return "B"
+        elif score >= 70:
+            return "C"
+        elif score >= 60:
+            return "D"
+        else:
+            return "F"
+
+    count = 1_000_000
+    scores = array("i", (random.randint(0, 100) for _ in range(count)))
+    score_bytes = array("B", scores)  # the same scores, one byte each
+
+    start = time.perf_counter()
+    expected = [get_grade_ladder(score) for score in scores]
+    ladder_time = time.perf_counter() - start
+    start = time.perf_counter()
+    bisect_codes = LETTER_GRADES.classify_many(scores)
+    bisect_time = time.perf_counter() - start
+    start = time.perf_counter()
+    table_codes = LETTER_GRADE_TABLE.classify_many(scores)
+    table_time = time.perf_counter() - start
+    start = time.perf_counter()
+    translate_codes = LETTER_GRADE_TABLE.classify_many(score_bytes)
+    translate_time = time.perf_counter() - start
+
+    print(f"\n{count:,} scores:")
+    print(f"  if/elif ladder      {ladder_time:.3f}s")
+    print(f"  bisect (any number) {bisect_time:.3f}s")
+    print(f"  integer table       {table_time:.3f}s")
+    print(f"  bytes.translate     {translate_time:.4f}s")
+    print(f"Same grades: {LETTER_GRADES.labels_for(bisect_codes) == expected}, "
+          f"{bisect_codes == table_codes == translate_codes}")
+    print(f"Counts: {LETTER_GRADES.counts(translate_codes)}")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Describe threshold ladders as (cutoff, label) data, written once
+# - bisect_right over sorted cutoffs finds the band in O(log k)
+# - Return small integer codes in bytes; map codes to labels only when needed
+# - For small integer domains, precompute every answer into a lookup table
+# - bytes.translate classifies byte-sized values in a single C call
+# ============================================================================
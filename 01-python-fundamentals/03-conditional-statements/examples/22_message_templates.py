@@ -0,0 +1,352 @@
+# ============================================================================
+# FILENAME: 22_message_templates.py
+# DESCRIPTION: Demonstrates precompiled message templates with cached plural
+#              forms and batch rendering into a single output buffer
+# ============================================================================
+
+"""
+pluralize and item_count_message in 05_ternary_expressions.py build every
+message from scratch: each call concatenates singular + 's', chooses the
+form with a conditional and formats a new f-string. A notification service
+sends millions of these messages, but with only a handful of nouns and a
+handful of message texts.
+
+This module does the repeated work once:
+- A template such as "You have {count} {item|count}" is parsed once into a
+  plain str.format() string. {item|count} means "item, in the form that
+  matches count"
+- Plural forms are resolved per (noun, count class) and cached, so "apple"
+  becomes "apples" once, not once per message
+- Finished messages are remembered per row of values in a bounded cache,
+  since the same (count, item) rows keep coming back
+- Batches are given as columns (a list of counts, a list of items), and
+  map() drives the lookups and str.format over them in C. The messages are
+  joined into one string, or written to a buffer with a single write()
+- Compiled templates live in a bounded LRU cache keyed by their source
+  text, so ad-hoc calls with the same text do not compile it again
+"""
+
+import io
+import weakref
+from collections import OrderedDict
+from itertools import repeat
+from operator import eq
+from string import Formatter
+
+# ----------------------------------------------------------------------------
+# 1. Cached Plural Forms
+# ----------------------------------------------------------------------------
+
+# Nouns whose plural is not singular + "s"
+IRREGULAR_PLURALS = {"child": "children", "person": "people", "mouse": "mice",
+                     "box": "boxes", "class": "classes"}
+
+class PluralForms(dict):
+    """(noun, count class) -> word form, filled in on first use.
+
+    English has two count classes: exactly one, and everything else. The
+    class is stored as the bool `count == 1`, which C code can compute with
+    operator.eq. A missing pair is resolved once by __missing__; after that
+    a lookup is a plain dict access, so map(forms.__getitem__, keys) runs
+    without calling any Python code.
+    """
+
+    def __init__(self, capacity=10_000):
+        super().__init__()
+        self.capacity = capacity
+
+    def __missing__(self, key):
+        noun, is_one = key
+        form = noun if is_one else IRREGULAR_PLURALS.get(noun) or noun + "s"
+        if len(self) >= self.capacity:
+            self.clear()  # a flood of one-off nouns must not grow it forever
+        self[key] = form
+        return form
+
+PLURAL_FORMS = PluralForms()
+
+def plural_form(count, noun):
+    """Return the form of `noun` that matches `count`."""
+    return PLURAL_FORMS[noun, count == 1]
+
+def plural_forms(counts, nouns):
+    """plural_form for whole columns, as an iterator built from C functions."""
+    return map(PLURAL_FORMS.__getitem__, zip(nouns, map(eq, counts, repeat(1))))
+
+def register_plural(singular, plural):
+    """Add an irregular plural and drop the forms and messages already cached."""
+    IRREGULAR_PLURALS[singular] = plural
+    PLURAL_FORMS.clear()
+    for template in list(_TEMPLATES):
+        template._rendered.clear()
+
+# ----------------------------------------------------------------------------
+# 2. Compiled Templates
+# ----------------------------------------------------------------------------
+
+class RenderedMessages(dict):
+    """Row of field values -> finished message, filled in on first use.
+
+    Notifications repeat: "You have 1 order" goes out thousands of times.
+    Caching whole messages turns each repeat into one dict lookup. The
+    cache is cleared when it reaches `capacity`, so rows that never repeat
+    cost a little churn but no unbounded memory. A key is the row of
+    values followed by their types: 1, 1.0 and True compare equal but
+    print differently, so they must not share a message.
+    """
+
+    def __init__(self, render_row, capacity=4096):
+        super().__init__()
+        self.render_row = render_row
+        self.capacity = capacity
+
+    def __missing__(self, row):
+        message = self.render_row(row)
+        if len(self) >= self.capacity:
+            self.clear()
+        self[row] = message
+        return message
+
+# Every live template, so register_plural() can clear the messages they
+# built with the old plural
+_TEMPLATES = weakref.WeakSet()
+
+class Template:
+    """A message template parsed once into a positional str.format string.
+
+    Fields are written as in str.format ("{count}", "{price:.2f}"), but
+    format specs cannot contain nested fields ("{n:>{width}}"). A field
+    "{noun|count}" is replaced by the noun in the form that matches the
+    count field. Compiling turns the source into something like
+    "You have {0} {2}" plus the list of values to pass, so rendering is a
+    single str.format call. Finished messages are remembered per row of
+    values and their types (see RenderedMessages); field values must be
+    hashable.
+
+    Attributes:
+        source (str): The template text
+        fields (tuple): Names of the fields, in first-seen order
+    """
+
+    __slots__ = ("source", "fields", "_plurals", "_format", "_rendered", "__weakref__")
+
+    def __init__(self, source, memo_capacity=4096):
+        fields = []
+        plurals = []  # (noun field, count field)
+        parsed = []   # (literal, field name or plural number, conversion, spec)
+        for literal, name, spec, conversion in Formatter().parse(source):
+            if name is None:
+                parsed.append((literal, None, None, None))
+                continue
+            names = name.split("|")
+            if len(names) > 2 or not all(map(str.isidentifier, names)):
+                raise ValueError(f"Unsupported field in template: {{{name}}}")
+            if "{" in spec:
+                # The nested field would only be looked up (and fail) at render time
+                raise ValueError(f"Nested fields in format specs are not supported: "
+                                 f"{{{name}:{spec}}}")
+            for field in names:
+                if field not in fields:
+                    fields.append(field)
+            if len(names) == 2:
+                plurals.append(tuple(names))
+                name = len(plurals) - 1
+            parsed.append((literal, name, conversion, spec))
+
+        # Positional slots: the plain fields first, then one per plural field
+        parts = []
+        for literal, name, conversion, spec in parsed:
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if name is None:
+                continue
+            index = len(fields) + name if isinstance(name, int) else fields.index(name)
+            parts.append("{%d%s%s}" % (index, f"!{conversion}" if conversion else "",
+                                       f":{spec}" if spec else ""))
+
+        self.source = source
+        self.fields = tuple(fields)
+        self._plurals = tuple((fields.index(noun), fields.index(count)) for noun, count in plurals)
+        self._format = "".join(parts).format
+        self._rendered = RenderedMessages(self._render_row, memo_capacity)
+        _TEMPLATES.add(self)
+
+    def _render_row(self, key):
+        """Format one row of values given in `fields` order.
+
+        `key` is the row followed by the types of its values; only the
+        values are formatted.
+        """
+        row = key[:len(self.fields)]
+        args = list(row)
+        for noun, count in self._plurals:
+            args.append(PLURAL_FORMS[row[noun], row[count] == 1])
+        return self._format(*args)
+
+    def render(self, **values):
+        """Render one message.
+
+        Raises:
+            KeyError: If a field has no value
+        """
+        row = tuple(map(values.__getitem__, self.fields))
+        return self._rendered[row + tuple(map(type, row))]
+
+    def render_values(self, *values):
+        """Render one message from values given in `fields` order.
+
+        Skips the keyword dict of render(); meant for wrappers with a
+        fixed set of fields.
+        """
+        return self._rendered[values + tuple(map(type, values))]
+
+    def render_batch(self, columns, memo=True):
+        """Render many messages from columns of values.
+
+        Args:
+            columns (dict): Field name -> sequence of values, all the same length
+            memo (bool, optional): Reuse finished messages for repeated rows.
+                Turn it off when rows rarely repeat (e.g. each has a unique id)
+
+        Returns:
+            iterator: The messages, produced by map() in C
+        """
+        args = [columns[name] for name in self.fields]
+        if memo:
+            types = [map(type, column) for column in args]
+            return map(self._rendered.__getitem__, zip(*args, *types))
+        for noun, count in self._plurals:
+            args.append(plural_forms(args[count], args[noun]))
+        return map(self._format, *args)
+
+    def write_batch(self, columns, out, sep="\n", memo=True):
+        """Write a batch of messages to `out` with one write() call.
+
+        Returns:
+            int: The number of characters written
+        """
+        return out.write(sep.join(self.render_batch(columns, memo)) + sep)
+
+    def __repr__(self):
+        return f"Template({self.source!r})"
+
+# ----------------------------------------------------------------------------
+# 3. The Compiled-Template Cache
+# ----------------------------------------------------------------------------
+
+class TemplateCache:
+    """A bounded LRU cache of compiled templates, keyed by source text."""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._templates = OrderedDict()
+
+    def get(self, source):
+        """Return the compiled template for `source`, compiling it on a miss."""
+        template = self._templates.get(source)
+        if template is not None:
+            self.hits += 1
+            self._templates.move_to_end(source)
+            return template
+        self.misses += 1
+        template = self._templates[source] = Template(source)
+        if len(self._templates) > self.capacity:
+            self._templates.popitem(last=False)
+        return template
+
+    def __len__(self):
+        return len(self._templates)
+
+_cache = TemplateCache()
+
+def render(source, **values):
+    """Render one message from template text, compiling it at most once."""
+    return _cache.get(source).render(**values)
+
+def render_batch(source, columns, out=None, sep="\n", memo=True):
+    """Render a batch of messages into one string, or write it to `out`."""
+    template = _cache.get(source)
+    if out is not None:
+        return template.write_batch(columns, out, sep, memo)
+    return sep.join(template.render_batch(columns, memo))
+
+ITEM_COUNT = Template("You have {count} {item|count}")
+_ITEM_COUNT_MESSAGES = ITEM_COUNT._rendered
+
+def item_count_message(count, item):
+    """Like item_count_message in 05_ternary_expressions.py.
+
+    One difference: nouns in IRREGULAR_PLURALS get their real plural, so
+    3 "child" gives "children" and 2 "box" gives "boxes", where the original
+    (singular + 's') gives "childs" and "boxs".
+    """
+    # The message cache key, built inline: (values..., their types...)
+    return _ITEM_COUNT_MESSAGES[count, item, type(count), type(item)]
+
+# ----------------------------------------------------------------------------
+# 4. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    print(item_count_message(1, "apple"))   # You have 1 apple
+    print(item_count_message(5, "apple"))   # You have 5 apples
+    print(item_count_message(3, "child"))   # You have 3 children
+    print(item_count_message(1.0, "apple")) # You have 1.0 apple
+    for name, orders, total in [("Ana", 2, 1234.5), ("Ben", 1, 80)]:
+        print(render("{name}, your {count} {order|count} ship for ${total:,.2f}",
+                     name=name, count=orders, order="order", total=total))
+
+    def pluralize(count, singular, plural=None):
+        """The version from 05_ternary_expressions.py."""
+        if plural is None:
+            plural = singular + 's'
+        return singular if count == 1 else plural
+
+    def item_count_message_original(count, item):
+        return f"You have {count} {pluralize(count, item)}"
+
+    count = 1_000_000
+    nouns = ["apple", "order", "message", "ticket", "invoice", "coupon"]
+    counts = [random.choice((1, 1, 2, 3, 5, 12)) for _ in range(count)]
+    items = [random.choice(nouns) for _ in range(count)]
+
+    start = time.perf_counter()
+    expected = [item_count_message_original(c, i) for c, i in zip(counts, items)]
+    original_time = time.perf_counter() - start
+    start = time.perf_counter()
+    single = [item_count_message(c, i) for c, i in zip(counts, items)]
+    single_time = time.perf_counter() - start
+    start = time.perf_counter()
+    buffer = io.StringIO()
+    render_batch("You have {count} {item|count}", {"count": counts, "item": items}, out=buffer)
+    batch_time = time.perf_counter() - start
+    start = time.perf_counter()
+    joined = "\n".join(expected) + "\n"
+    join_time = time.perf_counter() - start
+    start = time.perf_counter()
+    unmemoized = ITEM_COUNT.render_batch({"count": counts, "item": items}, memo=False)
+    same_unmemoized = list(unmemoized) == expected
+    plain_time = time.perf_counter() - start
+
+    print(f"\n{count:,} messages:")
+    print(f"  original functions      {original_time:.3f}s (+{join_time:.3f}s to join)")
+    print(f"  compiled, one at a time {single_time:.3f}s")
+    print(f"  compiled batch + buffer {batch_time:.3f}s (joined and written)")
+    print(f"  batch without memo      {plain_time:.3f}s (for rows that rarely repeat)")
+    print(f"Same messages: {single == expected and buffer.getvalue() == joined and same_unmemoized}")
+    print(f"Plural forms cached: {len(PLURAL_FORMS)}")
+    print(f"Template cache: {len(_cache)} compiled, {_cache.hits} hits, {_cache.misses} misses")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Parse a template once into a str.format string; render with one call
+# - Cache plural forms per (noun, count class) instead of rebuilding them
+# - Batch as columns so map() drives the formatting in C
+# - Remember finished messages when the same rows keep coming back
+# - Join the batch once, or write it to a buffer with a single write()
+# - Keep compiled templates in a bounded LRU keyed by their source text
+# ============================================================================
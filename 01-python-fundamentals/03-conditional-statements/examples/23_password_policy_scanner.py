@@ -0,0 +1,374 @@
+# ============================================================================
+# FILENAME: 23_password_policy_scanner.py
+# DESCRIPTION: Demonstrates a table-driven character-class scanner for password
+#              policies, with a 256-entry lookup table and batch audits
+# ============================================================================
+
+"""
+validate_password in 03_else_only.py walks the password up to three times:
+len(), then any(c.isupper() ...), then any(c.isdigit() ...), with a Python
+generator step per character. 09_validation_rule_engine.py folds the checks
+into one regular expression, which answers "valid or not" but does not say
+how many characters of each kind a password has.
+
+This module classifies each character once and then only looks at numbers:
+- Each ASCII byte maps to a character class (lower, upper, digit, symbol,
+  space, other) through a 256-entry table. bytes.translate() applies the
+  table to a whole password in one C call, then one bytes.count() per class
+  tallies the codes. That is seven short C scans, but no Python step per
+  character
+- The tallies form a feature vector. A policy is a list of rules such as
+  "upper >= 1" or "length <= 64" over that vector, built from settings
+  instead of hard-coded if statements
+- Non-ASCII passwords take a slower path that classifies each character
+  once with the str methods
+- audit() checks millions of stored candidates: each chunk is translated
+  as one joined buffer, the rules are evaluated column by column with
+  map(), and chunks can be spread over a process pool. The result counts
+  failures per rule
+"""
+
+import math
+from array import array
+from collections import namedtuple
+from itertools import islice, repeat
+from operator import gt, lt
+
+# ----------------------------------------------------------------------------
+# 1. The Character-Class Table
+# ----------------------------------------------------------------------------
+
+# Class codes; a code is also the feature's index in Features
+LOWER, UPPER, DIGIT, SYMBOL, SPACE, OTHER = range(1, 7)
+CLASS_CODES = (LOWER, UPPER, DIGIT, SYMBOL, SPACE, OTHER)
+NON_ASCII = 7   # bytes 128-255: the password needs the Unicode path
+SEPARATOR = 0   # marks the end of a password in audit()'s joined buffers
+
+def char_class(char):
+    """The class code of one character (the definition the table is built from)."""
+    if char.islower():
+        return LOWER
+    if char.isupper():
+        return UPPER
+    if char.isdigit():
+        return DIGIT
+    if char.isspace():
+        return SPACE
+    if char.isalnum():
+        return OTHER  # letters without case, like CJK characters
+    return SYMBOL
+
+CLASS_TABLE = bytes(char_class(chr(b)) if b < 128 else NON_ASCII for b in range(256))
+
+# The same table, but a newline ends a password instead of being a space
+_audit_table = bytearray(CLASS_TABLE)
+_audit_table[ord("\n")] = SEPARATOR
+AUDIT_TABLE = bytes(_audit_table)
+
+# ----------------------------------------------------------------------------
+# 2. Features
+# ----------------------------------------------------------------------------
+
+Features = namedtuple("Features", ["length", "lower", "upper", "digit", "symbol", "space", "other"])
+
+def _unicode_features(text):
+    """One pass over a non-ASCII str, classifying each character once."""
+    counts = [len(text), 0, 0, 0, 0, 0, 0]
+    for char in text:
+        counts[char_class(char)] += 1
+    return Features(*counts)
+
+def class_codes(password):
+    """Translate an ASCII password into one class code per character.
+
+    Returns:
+        bytes or None: The codes, or None if the password is not ASCII
+    """
+    if isinstance(password, str):
+        # isascii() is O(1) for str: CPython records it when creating the string
+        return password.encode("ascii").translate(CLASS_TABLE) if password.isascii() else None
+    return password.translate(CLASS_TABLE) if password.isascii() else None
+
+def features(password):
+    """Count the characters of each class in a password.
+
+    Args:
+        password (str or bytes): bytes above 127 are decoded as UTF-8 and
+            classified with the str methods
+
+    Returns:
+        Features: length and one count per class
+    """
+    codes = class_codes(password)
+    if codes is None:
+        if isinstance(password, bytes):
+            password = password.decode("utf-8", "surrogateescape")
+        return _unicode_features(password)
+    return Features(len(codes), *map(codes.count, CLASS_CODES))
+
+# ----------------------------------------------------------------------------
+# 3. Policies
+# ----------------------------------------------------------------------------
+
+FEATURE_INDEX = {name: index for index, name in enumerate(Features._fields)}
+
+Rule = namedtuple("Rule", ["name", "feature", "minimum", "maximum", "message"])
+
+class PasswordPolicy:
+    """An ordered list of rules over a password's feature vector.
+
+    Each rule bounds one feature (minimum and/or maximum). The first rule
+    that fails gives the message, like the if/elif chain it replaces.
+
+    Attributes:
+        rules (tuple): The Rule objects, in the order they are checked
+    """
+
+    def __init__(self, rules, valid_message="Password is valid"):
+        for rule in rules:
+            if rule.feature not in FEATURE_INDEX:
+                raise ValueError(f"Unknown feature {rule.feature!r} in rule {rule.name!r}")
+        self.rules = tuple(rules)
+        self.valid_message = valid_message
+        # (feature index, low, high, rule); a missing bound becomes one that always holds
+        self._checks = tuple(
+            (FEATURE_INDEX[rule.feature],
+             0 if rule.minimum is None else rule.minimum,
+             math.inf if rule.maximum is None else rule.maximum,
+             rule)
+            for rule in self.rules)
+
+    @classmethod
+    def build(cls, min_length=8, max_length=None, min_upper=1, min_digit=1,
+              min_lower=0, min_symbol=0, allow_spaces=True):
+        """Build a policy from settings (the defaults match 03_else_only.py)."""
+        rules = [Rule("length", "length", min_length, None,
+                      f"Password must be at least {min_length} characters long")]
+        if max_length is not None:
+            rules.append(Rule("max_length", "length", None, max_length,
+                              f"Password must be at most {max_length} characters long"))
+        for feature, minimum, noun in [("upper", min_upper, "uppercase letter"),
+                                       ("digit", min_digit, "digit"),
+                                       ("lower", min_lower, "lowercase letter"),
+                                       ("symbol", min_symbol, "symbol")]:
+            if minimum:
+                amount = "one" if minimum == 1 else str(minimum)
+                noun = noun if minimum == 1 else noun + "s"
+                rules.append(Rule(feature, feature, minimum, None,
+                                  f"Password must contain at least {amount} {noun}"))
+        if not allow_spaces:
+            rules.append(Rule("spaces", "space", None, 0, "Password must not contain spaces"))
+        return cls(rules)
+
+    def failed_rule(self, vector):
+        """Return the first rule the feature vector breaks, or None."""
+        for index, low, high, rule in self._checks:
+            if not low <= vector[index] <= high:
+                return rule
+        return None
+
+    def broken_rules(self, vector):
+        """Return every rule the feature vector breaks."""
+        return [rule for index, low, high, rule in self._checks
+                if not low <= vector[index] <= high]
+
+    def check(self, password):
+        """Return the message for a password, like validate_password.
+
+        ASCII passwords are checked straight from their class codes: each
+        rule counts only its own class, and checking stops at the first
+        failure, so no full feature vector is built.
+        """
+        codes = class_codes(password)
+        if codes is None:
+            rule = self.failed_rule(features(password))
+            return self.valid_message if rule is None else rule.message
+        for index, low, high, rule in self._checks:
+            # Class codes equal feature indexes; index 0 is the length
+            if not low <= (codes.count(index) if index else len(codes)) <= high:
+                return rule.message
+        return self.valid_message
+
+DEFAULT_POLICY = PasswordPolicy.build()
+
+def validate_password(password):
+    """Validate a password and return the message, like 03_else_only.py."""
+    return DEFAULT_POLICY.check(password)
+
+# ----------------------------------------------------------------------------
+# 4. Batch Audits
+# ----------------------------------------------------------------------------
+
+AuditReport = namedtuple("AuditReport", ["total", "passed", "failures"])
+
+def _audit_ascii(policy, passwords):
+    """Column-wise audit of ASCII passwords.
+
+    All passwords are joined and translated in one call, then split back
+    into per-password class strings. Each needed feature becomes an array
+    column, and each rule becomes a bytes column of 0/1 failure flags.
+
+    Returns:
+        tuple: (number passed, {rule name: failures})
+    """
+    count = len(passwords)
+    if not count:
+        return 0, {rule.name: 0 for rule in policy.rules}
+    codes = b"\n".join(passwords).translate(AUDIT_TABLE).split(bytes([SEPARATOR]))
+
+    columns = {}
+    for rule in policy.rules:
+        if rule.feature not in columns:
+            if rule.feature == "length":
+                columns["length"] = array("I", map(len, codes))
+            else:
+                code = FEATURE_INDEX[rule.feature]
+                columns[rule.feature] = array("I", map(bytes.count, codes, repeat(code)))
+
+    failures = {}
+    failed = 0  # OR of every rule's flags: one byte lane per password
+    for rule in policy.rules:
+        column = columns[rule.feature]
+        flags = 0
+        if rule.minimum is not None:
+            flags |= int.from_bytes(bytes(map(lt, column, repeat(rule.minimum))), "little")
+        if rule.maximum is not None:
+            flags |= int.from_bytes(bytes(map(gt, column, repeat(rule.maximum))), "little")
+        failures[rule.name] = failures.get(rule.name, 0) + bin(flags).count("1")
+        failed |= flags
+    return failed.to_bytes(count, "little").count(0), failures
+
+def _audit_chunk(args):
+    """Audit one chunk of bytes passwords (runs in a worker process)."""
+    policy, passwords = args
+    if not b"".join(passwords).isascii():
+        unicode_passwords = [p for p in passwords if not p.isascii()]
+        passwords = list(filter(bytes.isascii, passwords))
+    else:
+        unicode_passwords = []
+    passed, failures = _audit_ascii(policy, passwords)
+    for password in unicode_passwords:
+        broken = policy.broken_rules(_unicode_features(password.decode("utf-8", "surrogateescape")))
+        for rule in broken:
+            failures[rule.name] += 1
+        passed += not broken
+    return len(passwords) + len(unicode_passwords), passed, failures
+
+def _chunks(passwords, policy, chunk_size):
+    passwords = iter(passwords)
+    while True:
+        chunk = list(islice(passwords, chunk_size))
+        if not chunk:
+            return
+        if not isinstance(chunk[0], bytes):
+            chunk = [p.encode("utf-8", "surrogateescape") for p in chunk]
+        yield policy, chunk
+
+def audit(passwords, policy=DEFAULT_POLICY, processes=None, chunk_size=100_000):
+    """Check many passwords against a policy and count failures per rule.
+
+    Unlike check(), every rule is tested, so a password that is both too
+    short and has no digit counts against both rules.
+
+    Args:
+        passwords (iterable): str or bytes passwords (not mixed, and without
+            newlines; bytes are taken as UTF-8)
+        policy (PasswordPolicy, optional): The rules to apply
+        processes (int, optional): Worker processes; None runs in-process
+        chunk_size (int, optional): Passwords per work item
+
+    Returns:
+        AuditReport: total, passed, and {rule name: failures}
+    """
+    total = passed = 0
+    failures = {rule.name: 0 for rule in policy.rules}
+    chunks = _chunks(passwords, policy, chunk_size)
+    if processes:
+        from multiprocessing import Pool
+        with Pool(processes) as pool:
+            results = list(pool.imap_unordered(_audit_chunk, chunks))
+    else:
+        results = map(_audit_chunk, chunks)
+    for chunk_total, chunk_passed, chunk_failures in results:
+        total += chunk_total
+        passed += chunk_passed
+        for name, count in chunk_failures.items():
+            failures[name] += count
+    return AuditReport(total, passed, failures)
+
+def audit_file(path, policy=DEFAULT_POLICY, processes=None, chunk_size=100_000):
+    """audit() the passwords in a file, one per line."""
+    with open(path, "rb") as file:
+        lines = (line.rstrip(b"\r\n") for line in file)
+        return audit(lines, policy, processes, chunk_size)
+
+# ----------------------------------------------------------------------------
+# 5. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import os
+    import random
+    import string
+    import time
+
+    for password in ["short", "nouppercase1", "NODIGITS", "Valid123", "Ünïcödé99"]:
+        print(f"Password: '{password}' → {validate_password(password)}")
+    print(features("Pa ss-word 42"))
+
+    strict = PasswordPolicy.build(min_length=12, max_length=64, min_symbol=1,
+                                  min_lower=1, allow_spaces=False)
+    for password in ["Valid123", "Longer-Valid-1234", "With Space-1234"]:
+        print(f"Strict: '{password}' → {strict.check(password)}")
+
+    def validate_password_original(password):
+        """The version from 03_else_only.py."""
+        if len(password) < 8:
+            return "Password must be at least 8 characters long"
+        elif not any(c.isupper() for c in password):
+            return "Password must contain at least one uppercase letter"
+        elif not any(c.isdigit() for c in password):
+            return "Password must contain at least one digit"
+        else:
+            return "Password is valid"
+
+    count = 1_000_000
+    alphabet = string.ascii_lowercase * 3 + string.ascii_uppercase + string.digits + "!@#$%"
+    candidates = ["".join(random.choices(alphabet, k=random.randint(5, 16))) for _ in range(count)]
+    encoded = [p.encode() for p in candidates]
+
+    start = time.perf_counter()
+    expected = [validate_password_original(p) for p in candidates]
+    original_time = time.perf_counter() - start
+    start = time.perf_counter()
+    single = [validate_password(p) for p in candidates]
+    single_time = time.perf_counter() - start
+    start = time.perf_counter()
+    report = audit(encoded)
+    audit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    parallel = audit(encoded, processes=2)
+    parallel_time = time.perf_counter() - start
+
+    print(f"\n{count:,} candidate passwords:")
+    print(f"  original validate_password  {original_time:.3f}s")
+    print(f"  features + policy, each     {single_time:.3f}s")
+    print(f"  audit (column-wise)         {audit_time:.3f}s")
+    print(f"  audit on 2 processes        {parallel_time:.3f}s ({os.cpu_count()} CPU core(s))")
+    print(f"Same messages: {single == expected}; "
+          f"passed matches: {report.passed == expected.count('Password is valid')}; "
+          f"parallel identical: {parallel == report}")
+    print(f"Failures per rule: {report.failures}")
+    print(f"Strict policy: {audit(encoded, strict).failures}")
+    print(f"Mixed ASCII and Unicode: {audit(['Ünïcödé99', 'Straße', 'Valid123', 'short'])}")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - A 256-entry table maps every byte to its character class
+# - One bytes.translate() plus one bytes.count() per class compute all
+#   features in C, with no Python loop over the characters
+# - Non-ASCII text falls back to classifying each character exactly once
+# - Policies are rules over the feature vector, built from settings
+# - Audits join chunks into one buffer, evaluate rules column by column,
+#   and can spread chunks over a process pool
+# ============================================================================
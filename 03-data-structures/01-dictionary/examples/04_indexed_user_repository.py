@@ -0,0 +1,287 @@
+# ============================================================================
+# FILENAME: 04_indexed_user_repository.py
+# DESCRIPTION: Demonstrating dictionaries as hash indexes over compact
+#              __slots__ records (an in-memory user repository)
+# ============================================================================
+
+"""
+Several examples in this repository look users up the slow way:
+- create_user / find_user in 05_documentation_and_best_practices.py rebuild
+  a dict of users on every call
+- find_user / get_user_role in 03_else_only.py scan a list of dicts
+- get_user in 08_common_patterns.py rebuilds its users dict per call
+
+A list scan is O(n) per lookup. A dict lookup is O(1) on average, so the
+usual fix is to keep one dictionary per field you search by (an "index")
+and update every index whenever a record changes.
+
+Records are stored as instances of a class with __slots__. A slotted object
+has no per-instance __dict__, so it uses a fraction of the memory of a dict
+with the same fields.
+"""
+
+import csv
+import json
+
+# ----------------------------------------------------------------------------
+# 1. Compact Records with __slots__
+# ----------------------------------------------------------------------------
+
+class UserRecord:
+    """One user. __slots__ removes the per-instance __dict__."""
+
+    __slots__ = ("user_id", "username", "email", "role", "is_admin", "login_count")
+
+    def __init__(self, user_id, username, email, role="User",
+                 is_admin=False, login_count=0):
+        self.user_id = user_id
+        self.username = username
+        self.email = email
+        self.role = role
+        self.is_admin = is_admin
+        self.login_count = login_count
+
+    def to_dict(self):
+        """Return the record as a plain dict (e.g. for JSON output)."""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"UserRecord({self.user_id!r}, {self.username!r}, {self.email!r})"
+
+# ----------------------------------------------------------------------------
+# 2. The Repository and Its Indexes
+# ----------------------------------------------------------------------------
+
+class UserRepository:
+    """In-memory user store with O(1) lookups by id, username and email.
+
+    Every index is a dict from field value to the same UserRecord object,
+    so the records themselves are stored only once. Usernames and emails
+    are indexed case-insensitively.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_username = {}
+        self._by_email = {}
+        self._next_id = 1
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    # --- writes ------------------------------------------------------------
+
+    def create_user(self, username, email, role="User", is_admin=False,
+                    login_count=0, user_id=None):
+        """Add a user and index it.
+
+        Args:
+            username (str): Unique username
+            email (str): Unique email address
+            role (str, optional): The user's role. Defaults to "User".
+            is_admin (bool, optional): Whether the user is an admin
+            login_count (int, optional): Initial login count
+            user_id (int, optional): Explicit id; assigned automatically
+                when None
+
+        Returns:
+            UserRecord: The stored record
+
+        Raises:
+            ValueError: If the id, username or email is already taken
+        """
+        if user_id is None:
+            user_id = self._next_id
+        username_key, email_key = username.lower(), email.lower()
+        if user_id in self._by_id:
+            raise ValueError(f"User id {user_id} already exists")
+        if username_key in self._by_username:
+            raise ValueError(f"Username {username!r} already exists")
+        if email_key in self._by_email:
+            raise ValueError(f"Email {email!r} already exists")
+
+        record = UserRecord(user_id, username, email, role, is_admin, login_count)
+        self._by_id[user_id] = record
+        self._by_username[username_key] = record
+        self._by_email[email_key] = record
+        self._next_id = max(self._next_id, user_id + 1)
+        return record
+
+    def update_user(self, user_id, **changes):
+        """Change fields of a user, keeping every index in sync.
+
+        Args:
+            user_id (int): The user to change
+            **changes: New values, e.g. email="new@example.com"
+
+        Returns:
+            UserRecord: The updated record
+
+        Raises:
+            KeyError: If the user does not exist
+            ValueError: If a new username or email is already taken, or a
+                field name is unknown
+        """
+        record = self._by_id[user_id]
+        # The id is the primary key, so it cannot be changed here
+        unknown = set(changes) - set(UserRecord.__slots__[1:])
+        if unknown:
+            raise ValueError(f"Cannot update fields: {sorted(unknown)}")
+
+        # Validate both unique fields before touching any index
+        moves = []
+        for field, index in (("username", self._by_username), ("email", self._by_email)):
+            if field in changes:
+                old_key = getattr(record, field).lower()
+                new_key = changes[field].lower()
+                if new_key != old_key:
+                    if new_key in index:
+                        raise ValueError(f"{field} {changes[field]!r} already exists")
+                    moves.append((index, old_key, new_key))
+
+        for index, old_key, new_key in moves:
+            del index[old_key]
+            index[new_key] = record
+        for field, value in changes.items():
+            setattr(record, field, value)
+        return record
+
+    def delete_user(self, user_id):
+        """Remove a user from the repository and all indexes.
+
+        Returns:
+            UserRecord or None: The removed record, or None if not found
+        """
+        record = self._by_id.pop(user_id, None)
+        if record is not None:
+            del self._by_username[record.username.lower()]
+            del self._by_email[record.email.lower()]
+        return record
+
+    # --- reads -------------------------------------------------------------
+
+    def find_user(self, user_id):
+        """Find a user by ID. Returns None if not found."""
+        return self._by_id.get(user_id)
+
+    def find_by_username(self, username):
+        """Find a user by username (case-insensitive). Returns None if not found."""
+        return self._by_username.get(username.lower())
+
+    def find_by_email(self, email):
+        """Find a user by email (case-insensitive). Returns None if not found."""
+        return self._by_email.get(email.lower())
+
+    def get_user_role(self, username, default="Unknown role"):
+        """Return a user's role, or a default for unknown usernames."""
+        record = self._by_username.get(username.lower())
+        return record.role if record is not None else default
+
+    # --- bulk loading ------------------------------------------------------
+
+    def load_records(self, rows):
+        """Insert many users from dicts with UserRecord field names.
+
+        Returns:
+            int: Number of users inserted
+        """
+        count = 0
+        for row in rows:
+            self.create_user(
+                row["username"], row["email"],
+                role=row.get("role", "User"),
+                is_admin=_to_bool(row.get("is_admin", False)),
+                login_count=int(row.get("login_count", 0)),
+                user_id=int(row["user_id"]) if row.get("user_id") not in (None, "") else None,
+            )
+            count += 1
+        return count
+
+    def load_csv(self, path):
+        """Load users from a CSV file with a header row."""
+        with open(path, newline="", encoding="utf-8") as file:
+            return self.load_records(csv.DictReader(file))
+
+    def load_jsonl(self, path):
+        """Load users from a JSON Lines file (one JSON object per line)."""
+        with open(path, encoding="utf-8") as file:
+            return self.load_records(json.loads(line) for line in file if line.strip())
+
+def _to_bool(value):
+    """Convert CSV text like 'true'/'1' to a bool; leave bools unchanged."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+    return bool(value)
+
+# ----------------------------------------------------------------------------
+# 3. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+    import tracemalloc
+
+    repo = UserRepository()
+    repo.create_user("Alice", "alice@example.com", role="Admin", is_admin=True)
+    repo.create_user("Bob", "bob@example.com")
+    repo.create_user("Charlie", "charlie@example.com", role="Moderator")
+
+    print("Lookups:")
+    print(repo.find_user(1))                          # UserRecord(1, 'Alice', 'alice@example.com')
+    print(repo.find_by_username("bob"))               # UserRecord(2, 'Bob', 'bob@example.com')
+    print(repo.get_user_role("Charlie"))              # Moderator
+    print(repo.get_user_role("Unknown"))              # Unknown role
+
+    repo.update_user(2, email="robert@example.com")
+    print(repo.find_by_email("robert@example.com"))   # UserRecord(2, 'Bob', 'robert@example.com')
+    print(repo.find_by_email("bob@example.com"))      # None
+    repo.delete_user(3)
+    print(f"Users left: {len(repo)}")                 # Users left: 2
+
+    # Bulk load from CSV
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "users.csv")
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["user_id", "username", "email", "role"])
+            for i in range(100, 200_100):
+                writer.writerow([i, f"user{i}", f"user{i}@example.com", "User"])
+
+        start = time.perf_counter()
+        print(f"\nLoaded {repo.load_csv(path):,} users from CSV "
+              f"in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    for i in range(100, 200_100):
+        repo.find_by_email(f"user{i}@example.com")
+    print(f"200,000 email lookups: {time.perf_counter() - start:.2f}s")
+
+    # Memory: slotted records vs plain dicts with the same fields
+    count = 100_000
+    tracemalloc.start()
+    as_dicts = [{"user_id": i, "username": "u", "email": "e", "role": "User",
+                 "is_admin": False, "login_count": 0} for i in range(count)]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    del as_dicts
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    as_records = [UserRecord(i, "u", "e") for i in range(count)]
+    record_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    print(f"\n{count:,} dicts: {dict_bytes / 1e6:.1f} MB, "
+          f"{count:,} slotted records: {record_bytes / 1e6:.1f} MB")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Keep one dictionary per searchable field for O(1) lookups
+# - Point every index at the same record object so data is stored once
+# - Update all indexes together on insert, update and delete
+# - Validate uniqueness before changing anything, so a failure leaves
+#   the indexes consistent
+# - __slots__ records use much less memory than dicts with the same fields
+# ============================================================================
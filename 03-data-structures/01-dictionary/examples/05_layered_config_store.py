@@ -0,0 +1,344 @@
+# ============================================================================
+# FILENAME: 05_layered_config_store.py
+# DESCRIPTION: Demonstrating a layered configuration store built on flat
+#              dictionaries, with lock-free reads and hot reload
+# ============================================================================
+
+"""
+get_config_value in 08_common_patterns.py does two lookups per call
+(`key in config`, then `config[key]`) and only reads one flat dict.
+
+Real applications usually combine several sources, where later ones win:
+    built-in defaults  <  a JSON config file  <  environment variables
+
+This module merges those layers ONCE into a flat dictionary whose keys are
+dotted paths ("database.pool.size"), so a lookup is a single dict.get().
+
+The merged dictionary is never modified after it is built. A reload builds
+a brand new dictionary and then swaps one attribute to point at it
+("copy-on-write"). Rebinding an attribute is atomic in CPython, so reader
+threads never need a lock: each read sees either the old snapshot or the
+new one, never a half-updated mix.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+_MISSING = object()
+
+# ----------------------------------------------------------------------------
+# 1. Flattening Nested Dictionaries
+# ----------------------------------------------------------------------------
+
+def freeze(section):
+    """Return a read-only copy of a nested dict (MappingProxyType all the way down)."""
+    return MappingProxyType({key: freeze(value) if isinstance(value, dict) else value
+                             for key, value in section.items()})
+
+def flatten(nested, prefix=""):
+    """Flatten nested dicts into {"a.b.c": value}.
+
+    Both the leaf values and every intermediate dict are stored, so
+    get("database") still returns the whole section. Sections are stored
+    frozen (see freeze), so a caller cannot change the snapshot through them.
+
+    Args:
+        nested (dict): Possibly nested configuration
+        prefix (str, optional): Prefix for every key (used in recursion)
+
+    Returns:
+        dict: Flat mapping of dotted path to value
+    """
+    flat = {}
+    for key, value in nested.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+            value = freeze(value)
+        flat[path] = value
+    return flat
+
+def deep_merge(base, override):
+    """Return a new dict with override's values layered over base."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+# ----------------------------------------------------------------------------
+# 2. Configuration Sources
+# ----------------------------------------------------------------------------
+
+def load_json_file(path):
+    """Read a JSON config file; a missing file is an empty layer.
+
+    Raises:
+        ValueError: If the file is not valid JSON or its top level is not
+            an object
+        OSError: If the file exists but cannot be read
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: the top level must be a JSON object, not {type(data).__name__}")
+    return data
+
+def load_environment(prefix, environ=None):
+    """Turn APP_DATABASE__PORT=5433 into {"database": {"port": 5433}}.
+
+    A double underscore separates nesting levels. Values are parsed as JSON
+    when possible ("5433" -> 5433, "true" -> True) and kept as text otherwise.
+
+    Args:
+        prefix (str): Only variables starting with this are used, e.g. "APP_"
+        environ (dict, optional): Defaults to os.environ
+
+    Returns:
+        dict: Nested configuration from the environment
+
+    Raises:
+        ValueError: If one variable sets a value where another needs a
+            section, as with APP_X=1 together with APP_X__Y=2
+    """
+    environ = os.environ if environ is None else environ
+    result = {}
+    for name, text in environ.items():
+        if not name.startswith(prefix):
+            continue
+        parts = name[len(prefix):].lower().split("__")
+        try:
+            value = json.loads(text)
+        except ValueError:
+            value = text
+        section = result
+        for part in parts[:-1]:
+            section = section.setdefault(part, {})
+            if not isinstance(section, dict):
+                raise ValueError(f"{name} needs a section where another variable set a value")
+        if isinstance(section.get(parts[-1]), dict):
+            raise ValueError(f"{name} sets a value where other variables define a section")
+        section[parts[-1]] = value
+    return result
+
+# ----------------------------------------------------------------------------
+# 3. The Configuration Store
+# ----------------------------------------------------------------------------
+
+class ConfigStore:
+    """Layered configuration with single-lookup reads and hot reload.
+
+    Attributes:
+        version (int): Incremented on every successful reload
+    """
+
+    def __init__(self, defaults=None, path=None, env_prefix=None, environ=None):
+        """Create the store and build the first snapshot.
+
+        Args:
+            defaults (dict, optional): Built-in default values
+            path (str, optional): JSON file layered over the defaults
+            env_prefix (str, optional): Environment variable prefix, e.g.
+                "APP_". Environment values override the file.
+            environ (dict, optional): Environment to read instead of
+                os.environ (handy for tests)
+        """
+        # A private deep copy: later changes to the caller's dict cannot leak in
+        self._defaults = copy.deepcopy(defaults or {})
+        self._path = path
+        self._env_prefix = env_prefix
+        self._environ = environ
+        self._reload_lock = threading.Lock()  # only writers take this
+        self._mtime = None
+        self._watcher = None
+        self._stop = threading.Event()
+        self.version = 0
+        self._snapshot = MappingProxyType({})
+        self.reload()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self._path).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def reload(self):
+        """Rebuild the flat snapshot from every layer and swap it in.
+
+        Returns:
+            bool: True if the new snapshot was installed, False if the file
+                was invalid or unreadable (the previous snapshot stays active)
+        """
+        with self._reload_lock:
+            mtime = self._file_mtime()
+            try:
+                merged = copy.deepcopy(self._defaults)
+                if self._path:
+                    merged = deep_merge(merged, load_json_file(self._path))
+                if self._env_prefix:
+                    merged = deep_merge(merged, load_environment(self._env_prefix, self._environ))
+            except (ValueError, OSError):
+                # A half-written, broken or unreadable file must not take
+                # down readers or the watcher thread
+                return False
+            # Build the new table completely, then publish it in one step
+            self._snapshot = MappingProxyType(flatten(merged))
+            self._mtime = mtime
+            self.version += 1
+            return True
+
+    def reload_if_changed(self):
+        """Reload only if the config file's modification time changed."""
+        if self._file_mtime() != self._mtime:
+            return self.reload()
+        return False
+
+    # --- reads (no locks) ----------------------------------------------------
+
+    def get(self, key, default=None):
+        """Return the value at a dotted path, or default. One dict lookup."""
+        return self._snapshot.get(key, default)
+
+    def __getitem__(self, key):
+        value = self._snapshot.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return key in self._snapshot
+
+    def snapshot(self):
+        """Return the current read-only snapshot.
+
+        Use it when several values must come from the same version.
+        """
+        return self._snapshot
+
+    # --- watching ------------------------------------------------------------
+
+    def start_watching(self, interval=1.0):
+        """Poll the file's mtime in a daemon thread and reload on change."""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while not self._stop.wait(interval):
+                self.reload_if_changed()
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stop the watcher thread started by start_watching()."""
+        if self._watcher is not None:
+            self._stop.set()
+            self._watcher.join()
+            self._watcher = None
+
+def get_config_value(config, key, default=None):
+    """Get a value with a default fallback in a single lookup.
+
+    Works with a plain dict (like 08_common_patterns.py) or a ConfigStore.
+    """
+    return config.get(key, default)
+
+# ----------------------------------------------------------------------------
+# 4. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import tempfile
+
+    defaults = {
+        "debug": False,
+        "port": 5000,
+        "log_level": "WARNING",
+        "database": {"host": "localhost", "pool": {"size": 5}},
+    }
+    environment = {"APP_DATABASE__POOL__SIZE": "20", "APP_DEBUG": "true"}
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "config.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"port": 8080, "database": {"host": "db.internal"}}, file)
+
+        config = ConfigStore(defaults, path=path, env_prefix="APP_", environ=environment)
+        print("Layered values:")
+        print(f"  port = {config.get('port')}")                          # 8080 (file)
+        print(f"  debug = {config.get('debug')}")                        # True (environment)
+        print(f"  database.host = {config.get('database.host')}")        # db.internal (file)
+        print(f"  database.pool.size = {config.get('database.pool.size')}")  # 20 (environment)
+        print(f"  host = {get_config_value(config, 'host', 'localhost')}")   # localhost (default)
+        try:
+            config.get("database")["host"] = "elsewhere"
+        except TypeError:
+            print("  sections are read-only")
+
+        # Readers in several threads while the file is rewritten
+        seen = set()
+        def reader():
+            for _ in range(200_000):
+                seen.add(config.get("port"))
+
+        config.start_watching(interval=0.01)
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"port": 9090}, file)
+        os.replace(path + ".tmp", path)  # atomic rename: no half-written file
+        for thread in threads:
+            thread.join()
+        time.sleep(0.05)
+        config.stop_watching()
+
+        print(f"\nPorts seen by readers: {sorted(seen)}")
+        print(f"Port after reload: {config.get('port')} (version {config.version})")
+
+    # Lookup cost: nested layers searched per call vs one flat lookup
+    layers = [{"database": {"pool": {"size": 20}}}, {"port": 9090}, defaults]
+
+    def get_nested(layers, path, default=None):
+        """Search every layer and walk the nested dicts on every call."""
+        for layer in layers:
+            value = layer
+            for part in path.split("."):
+                if not isinstance(value, dict) or part not in value:
+                    break
+                value = value[part]
+            else:
+                return value
+        return default
+
+    start = time.perf_counter()
+    for _ in range(1_000_000):
+        get_nested(layers, "database.pool.size", 1)
+    nested_time = time.perf_counter() - start
+
+    get = config.get
+    start = time.perf_counter()
+    for _ in range(1_000_000):
+        get("database.pool.size", 1)
+    store_time = time.perf_counter() - start
+    print(f"\n1M lookups: nested layers {nested_time:.2f}s, flat store {store_time:.2f}s")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Merge configuration layers once, not on every lookup
+# - Flatten nested keys into dotted paths so a lookup is one dict.get()
+# - Never mutate a published snapshot; build a new one and swap the reference
+# - Readers need no lock because rebinding an attribute is atomic
+# - Replace config files with os.replace() so readers never see half a file
+# ============================================================================
@@ -0,0 +1,323 @@
+# ============================================================================
+# FILENAME: 07_quantile_sketches.py
+# DESCRIPTION: Demonstrates approximate quantiles over endless streams with a
+#              KLL sketch (bounded memory, mergeable, serializable)
+# ============================================================================
+
+"""
+calculate_median (05_documentation_and_best_practices.py) and get_statistics
+(02_tuple_unpacking.py) need the whole sequence in memory (len() and sorted()
+both require a list). That is fine for a list of ten numbers, but not for
+a metrics stream that never ends.
+
+A quantile sketch keeps a small, fixed-size summary of everything it has
+seen and answers "what is the median / p95 / p99?" with a known error bound.
+This module implements the KLL sketch (Karnin, Lang and Liberty, 2016):
+- Memory is bounded by the accuracy parameter k, not by the stream length
+- Two sketches can be merged, so each process can keep its own sketch
+- A sketch can be written to compact bytes and read back later
+
+The helpers at the end keep the names of the exact helpers and take an
+`approximate` flag, so callers can switch modes with one argument.
+"""
+
+import random
+import struct
+
+# ----------------------------------------------------------------------------
+# 1. The KLL Sketch
+# ----------------------------------------------------------------------------
+
+class KLLSketch:
+    """Approximate quantile summary with bounded memory.
+
+    Level h of the sketch holds items that each stand for 2**h original
+    values. When the sketch grows past its capacity, one level is sorted and
+    every other item (from a random start) is promoted to the next level.
+
+    Attributes:
+        k (int): Accuracy parameter. Rank error is roughly 1.7 / k.
+        count (int): Number of values added so far
+    """
+
+    _HEADER = struct.Struct("<4sBIQI")
+    _MAGIC = b"KLL1"
+    _VERSION = 1
+
+    def __init__(self, k=200, seed=None):
+        """Create an empty sketch.
+
+        Args:
+            k (int, optional): Accuracy parameter. Defaults to 200
+                (about 1% rank error).
+            seed (int, optional): Seed for the compaction coin flips, for
+                reproducible results.
+
+        Raises:
+            ValueError: If k is smaller than 8
+        """
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.count = 0
+        self._levels = [[]]
+        self._random = random.Random(seed)
+
+    def _capacity(self, level):
+        """Maximum items allowed at a level; lower levels get less room."""
+        depth = len(self._levels) - level - 1
+        return max(2, int(self.k * (2 / 3) ** depth))
+
+    def _size(self):
+        return sum(len(items) for items in self._levels)
+
+    def _max_size(self):
+        return sum(self._capacity(level) for level in range(len(self._levels)))
+
+    def _compress(self):
+        """Compact levels until the sketch fits its memory budget again."""
+        while self._size() > self._max_size():
+            for level, items in enumerate(self._levels):
+                if len(items) >= self._capacity(level):
+                    break
+            if level + 1 == len(self._levels):
+                self._levels.append([])
+            items.sort()
+            # An odd item out stays behind so no weight is lost
+            keep = [items.pop()] if len(items) % 2 else []
+            offset = self._random.randrange(2)
+            self._levels[level + 1].extend(items[offset::2])
+            self._levels[level] = keep
+
+    def add(self, value):
+        """Add one value to the sketch."""
+        self._levels[0].append(value)
+        self.count += 1
+        if len(self._levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def update(self, values):
+        """Add every value from an iterable.
+
+        Returns:
+            KLLSketch: self, so calls can be chained
+        """
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one.
+
+        Args:
+            other (KLLSketch): Sketch built from a different part of the data
+
+        Returns:
+            KLLSketch: self, now summarising both inputs
+        """
+        while len(self._levels) < len(other._levels):
+            self._levels.append([])
+        for level, items in enumerate(other._levels):
+            self._levels[level].extend(items)
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        """Return (value, weight) pairs sorted by value."""
+        pairs = []
+        for level, items in enumerate(self._levels):
+            weight = 1 << level
+            pairs.extend((value, weight) for value in items)
+        pairs.sort()
+        return pairs
+
+    def quantile(self, q):
+        """Estimate the value at quantile q.
+
+        Args:
+            q (float): Quantile between 0 and 1 (0.5 is the median)
+
+        Returns:
+            float: Estimated value at that quantile
+
+        Raises:
+            ValueError: If the sketch is empty or q is out of range
+        """
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs):
+        """Estimate several quantiles with a single sort of the summary."""
+        if self.count == 0:
+            raise ValueError("quantile of empty sketch")
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError("quantiles must be between 0 and 1")
+        pairs = self._weighted_items()
+        total = sum(weight for _, weight in pairs)
+        results = []
+        for q in qs:
+            target = q * total
+            running = 0
+            answer = pairs[-1][0]
+            for value, weight in pairs:
+                running += weight
+                if running > target:
+                    answer = value
+                    break
+            results.append(answer)
+        return results
+
+    def to_bytes(self):
+        """Serialize the sketch into compact little-endian bytes.
+
+        Layout: magic, version, k, count, number of levels, then for each
+        level a 32-bit item count followed by that many float64 values.
+        """
+        parts = [self._HEADER.pack(self._MAGIC, self._VERSION, self.k,
+                                   self.count, len(self._levels))]
+        for items in self._levels:
+            parts.append(struct.pack(f"<I{len(items)}d", len(items), *items))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuild a sketch written by to_bytes().
+
+        Raises:
+            ValueError: If the data is not a serialized KLL sketch
+        """
+        magic, version, k, count, level_count = cls._HEADER.unpack_from(data)
+        if magic != cls._MAGIC or version != cls._VERSION:
+            raise ValueError("not a KLL sketch")
+        sketch = cls(k)
+        sketch.count = count
+        sketch._levels = []
+        offset = cls._HEADER.size
+        for _ in range(level_count):
+            (size,) = struct.unpack_from("<I", data, offset)
+            offset += 4
+            sketch._levels.append(list(struct.unpack_from(f"<{size}d", data, offset)))
+            offset += 8 * size
+        return sketch
+
+# ----------------------------------------------------------------------------
+# 2. Exact / Approximate Helpers
+# ----------------------------------------------------------------------------
+
+def _quantile_of_sorted(sorted_numbers, q):
+    """Nearest-rank quantile of data that is already sorted."""
+    if not sorted_numbers:
+        raise ValueError("quantile of empty data")
+    return sorted_numbers[min(int(q * len(sorted_numbers)), len(sorted_numbers) - 1)]
+
+def calculate_quantile(numbers, q, approximate=False, k=200):
+    """Calculate a quantile exactly or with a KLL sketch.
+
+    Args:
+        numbers (iterable): Numbers to summarise. Approximate mode also
+            accepts a KLLSketch.
+        q (float): Quantile between 0 and 1
+        approximate (bool, optional): Use a bounded-memory sketch.
+            Defaults to False.
+        k (int, optional): Sketch accuracy when approximate is True
+
+    Returns:
+        float: The quantile value
+    """
+    if approximate:
+        sketch = numbers if isinstance(numbers, KLLSketch) else KLLSketch(k).update(numbers)
+        return sketch.quantile(q)
+    return _quantile_of_sorted(sorted(numbers), q)
+
+def calculate_median(numbers, approximate=False, k=200):
+    """Calculate the median, exactly or approximately.
+
+    The exact mode matches calculate_median in
+    05_documentation_and_best_practices.py.
+    """
+    if approximate:
+        return calculate_quantile(numbers, 0.5, approximate=True, k=k)
+    sorted_numbers = sorted(numbers)
+    n = len(sorted_numbers)
+    if n % 2 == 0:
+        return (sorted_numbers[n//2 - 1] + sorted_numbers[n//2]) / 2
+    else:
+        return sorted_numbers[n//2]
+
+def get_statistics(numbers):
+    """Return (minimum, maximum, average, total) like 02_tuple_unpacking.py.
+
+    Unlike the original, this makes a single pass and accepts any iterable,
+    so a generator over an endless stream can be summarised in chunks.
+    """
+    low = high = None
+    total = 0
+    count = 0
+    for value in numbers:
+        count += 1
+        total += value
+        if low is None or value < low:
+            low = value
+        if high is None or value > high:
+            high = value
+    if count == 0:
+        raise ValueError("statistics of empty data")
+    return low, high, total / count, total
+
+def get_percentiles(numbers, qs=(0.5, 0.95, 0.99), approximate=False, k=200):
+    """Return a dict of quantile -> value, exactly or with a KLL sketch.
+
+    Exact mode sorts the data once and reads every quantile from it, so
+    numbers may be any iterable, including a generator.
+    """
+    if approximate:
+        sketch = numbers if isinstance(numbers, KLLSketch) else KLLSketch(k).update(numbers)
+        return dict(zip(qs, sketch.quantiles(qs)))
+    sorted_numbers = sorted(numbers)
+    return {q: _quantile_of_sorted(sorted_numbers, q) for q in qs}
+
+# ----------------------------------------------------------------------------
+# 3. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    def latency_stream(n, seed):
+        """Simulated request latencies in milliseconds."""
+        rng = random.Random(seed)
+        for _ in range(n):
+            yield rng.expovariate(1 / 40)
+
+    # Each "worker" keeps its own small sketch
+    workers = [KLLSketch(k=200, seed=i).update(latency_stream(100_000, i))
+               for i in range(4)]
+
+    # Ship the sketches as bytes and merge them centrally
+    payloads = [sketch.to_bytes() for sketch in workers]
+    combined = KLLSketch(k=200, seed=99)
+    for payload in payloads:
+        combined.merge(KLLSketch.from_bytes(payload))
+
+    exact = sorted(value for i in range(4) for value in latency_stream(100_000, i))
+    print(f"Values seen: {combined.count:,}")
+    print(f"Sketch size: {len(combined.to_bytes()):,} bytes "
+          f"(raw data: {8 * len(exact):,} bytes)")
+    for q in (0.5, 0.95, 0.99):
+        approx = combined.quantile(q)
+        true = exact[int(q * len(exact))]
+        print(f"p{int(q * 100)}: approx {approx:7.2f} ms, exact {true:7.2f} ms")
+
+    print("\nSame helpers, exact vs approximate:")
+    numbers = list(range(1, 10_001))
+    print(calculate_median(numbers))                    # Output: 5000.5
+    print(calculate_median(numbers, approximate=True))  # Close to 5000
+    print(get_statistics(iter(numbers)))                # Output: (1, 10000, 5000.5, 50005000)
+    print(get_percentiles(iter(numbers), approximate=True))
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Sketches trade a small, bounded error for constant memory
+# - KLL compacts sorted levels by keeping every other item
+# - Sketches merge, so workers can summarise locally and combine later
+# - struct turns a sketch into compact bytes for storage or transport
+# - Keep the exact helpers' names so callers can switch modes easily
+# ============================================================================
@@ -0,0 +1,194 @@
+# ============================================================================
+# FILENAME: 10_email_validation.py
+# DESCRIPTION: Demonstrates fast bulk email validation with precompiled
+#              patterns, cheap pre-filters, per-domain caching and processes
+# ============================================================================
+
+"""
+validate_email in 05_documentation_and_best_practices.py runs `import re`
+and passes a pattern string to re.match on every call. The re module keeps
+a small cache, but each call still pays for the import lookup, the cache
+lookup and the function-call overhead. When validating millions of contacts
+that overhead dominates.
+
+This module uses the same pattern (plus the RFC 5321 length limits) but:
+- Compiles its patterns once, at module level
+- Rejects obviously bad input (too long, no '@', '@' at either end) with
+  plain string operations before any regex runs
+- Checks the domain part only once per distinct domain (contact lists
+  repeat a few domains like gmail.com millions of times)
+- Streams addresses from a file or iterable and can spread the work over
+  several processes
+"""
+
+import re
+from functools import lru_cache
+
+# ----------------------------------------------------------------------------
+# 1. Precompiled Patterns
+# ----------------------------------------------------------------------------
+
+# Same rules as validate_email, split at the '@' so each half can be
+# checked (and cached) separately
+LOCAL_PART_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+')
+DOMAIN_PATTERN = re.compile(r'[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+# RFC 5321 limits an address to 254 characters and a local part to 64
+MAX_EMAIL_LENGTH = 254
+MAX_LOCAL_LENGTH = 64
+
+# ----------------------------------------------------------------------------
+# 2. Single Address Validation
+# ----------------------------------------------------------------------------
+
+@lru_cache(maxsize=100_000)
+def is_valid_domain(domain):
+    """Check the part after '@'. Cached because domains repeat a lot."""
+    return DOMAIN_PATTERN.fullmatch(domain) is not None
+
+def validate_email(email):
+    """Validate an email address format.
+
+    Args:
+        email (str): The email to validate
+
+    Returns:
+        bool: True if valid, False otherwise
+    """
+    # Cheap pre-filter: length and '@' position, no regex needed
+    if len(email) > MAX_EMAIL_LENGTH:
+        return False
+    at = email.find("@")
+    if at <= 0 or at > MAX_LOCAL_LENGTH or at == len(email) - 1:
+        return False
+
+    if LOCAL_PART_PATTERN.fullmatch(email, 0, at) is None:
+        return False
+    return is_valid_domain(email[at + 1:])
+
+# ----------------------------------------------------------------------------
+# 3. Batch Validation
+# ----------------------------------------------------------------------------
+
+def read_addresses(source):
+    """Yield stripped addresses from a file path or any iterable of strings.
+
+    Args:
+        source (str or iterable): Path to a text file with one address per
+            line, or an iterable of addresses
+
+    Yields:
+        str: The next address
+    """
+    if isinstance(source, str):
+        with open(source, encoding="utf-8") as file:
+            for line in file:
+                yield line.strip()
+    else:
+        for address in source:
+            yield address.strip()
+
+def _validate_chunk(addresses):
+    """Worker function: validate one chunk of addresses."""
+    return [(address, validate_email(address)) for address in addresses]
+
+def _chunked(iterable, size):
+    """Group an iterable into lists of at most `size` items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def validate_many(source, processes=None, chunk_size=10_000):
+    """Validate a stream of addresses.
+
+    Results come back in input order as (address, is_valid) pairs and are
+    produced lazily, so very large files never sit in memory at once.
+
+    Args:
+        source (str or iterable): File path or iterable of addresses
+        processes (int, optional): Worker processes. None or 1 validates in
+            the current process.
+        chunk_size (int, optional): Addresses sent to a worker at a time
+
+    Yields:
+        tuple: (address, is_valid)
+    """
+    addresses = read_addresses(source)
+    if not processes or processes == 1:
+        for address in addresses:
+            yield address, validate_email(address)
+        return
+
+    from multiprocessing import Pool
+    chunks = _chunked(addresses, chunk_size)
+    with Pool(processes) as pool:
+        # imap returns chunk results in input order
+        for results in pool.imap(_validate_chunk, chunks):
+            yield from results
+
+def count_valid(source, processes=None):
+    """Return (valid_count, invalid_count) for a stream of addresses."""
+    valid = invalid = 0
+    for _, is_valid in validate_many(source, processes=processes):
+        if is_valid:
+            valid += 1
+        else:
+            invalid += 1
+    return valid, invalid
+
+# ----------------------------------------------------------------------------
+# 4. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    def validate_email_original(email):
+        """The original version, for comparison."""
+        import re
+        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+        return bool(re.match(pattern, email))
+
+    samples = ["alice@example.com", "bob.smith+news@mail.co.uk", "no-at-sign.com",
+               "@example.com", "user@", "user@domain", "a@b@c.com", "x" * 300]
+    for email in samples:
+        print(f"{email[:30]:30} -> {validate_email(email)}")
+
+    domains = ["gmail.com", "yahoo.com", "example.org", "corp.example.co.uk", "bad_domain"]
+    addresses = [f"user{i}@{random.choice(domains)}" for i in range(300_000)]
+    addresses += ["broken-address"] * 20_000
+
+    # Both versions must agree on every address
+    assert all(validate_email(a) == validate_email_original(a) for a in addresses[:50_000])
+
+    start = time.perf_counter()
+    for address in addresses:
+        validate_email_original(address)
+    original_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    valid, invalid = count_valid(addresses)
+    fast_time = time.perf_counter() - start
+
+    print(f"\nOriginal: {original_time:.2f}s, batch: {fast_time:.2f}s "
+          f"({original_time / fast_time:.1f}x faster)")
+    print(f"Valid: {valid:,}, invalid: {invalid:,}")
+
+    start = time.perf_counter()
+    print(f"With 2 processes: {count_valid(addresses, processes=2)} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - Compile regular expressions once at module level, not inside functions
+# - Use cheap string checks to reject bad input before running a regex
+# - Cache results for values that repeat, like email domains
+# - Stream large inputs with generators instead of loading them into lists
+# - multiprocessing.Pool.imap spreads chunks over CPU cores in order
+# ============================================================================
@@ -0,0 +1,305 @@
+# ============================================================================
+# FILENAME: 12_out_of_core_processing.py
+# DESCRIPTION: Demonstrates constant-memory, chunked and parallel versions of
+#              complex_algorithm with bit-identical results
+# ============================================================================
+
+"""
+complex_algorithm in 05_documentation_and_best_practices.py builds a whole
+new list ([x * 2 for x in data]) just to take its mean, so it needs the
+input AND a copy of the same size in memory.
+
+The mean only needs a running total and a count, so the same result can be
+computed from any iterable, a file read in chunks, or a memory-mapped
+binary file, using constant memory:
+- complex_algorithm_streaming feeds every chunk, in order, into ONE sum()
+  call. It makes the same additions in the same order as the original, so
+  its result is bit-identical to complex_algorithm on every Python version
+  (including 3.12, whose sum() of floats uses compensated summation), and
+  big ints stay exact just as they do in the original
+
+That ordered sum cannot be split across processes: floating-point
+addition is not associative, so adding the same numbers in a different
+grouping can change the last bits of the total. For parallel runs this
+module also offers an exact mode with slightly different semantics:
+- math.fsum returns the correctly rounded sum of a chunk
+- The rounding error of that result is recovered by calling fsum again with
+  the result subtracted, until nothing is left. This gives a short list of
+  floats (the "partials") whose exact sum is the chunk's exact sum
+- Partials from different chunks or processes can simply be concatenated,
+  and one final fsum gives the correctly rounded total
+
+complex_algorithm_exact therefore gives the same bits however the data is
+split or ordered. Its results can differ from the original in the last
+bits (sum() rounds after every addition), and values are converted to
+float first, so ints above 2**53 are rounded.
+"""
+
+import math
+import mmap
+from array import array
+from itertools import chain, islice, repeat
+from operator import mul
+
+# ----------------------------------------------------------------------------
+# 1. Exact, Mergeable Partial Sums
+# ----------------------------------------------------------------------------
+
+def exact_partials(values):
+    """Return floats whose exact sum equals the exact sum of `values`.
+
+    Args:
+        values (sequence): Floats (a list, array or memoryview)
+
+    Returns:
+        list: Usually one to three floats
+    """
+    partials = []
+    try:
+        total = math.fsum(values)
+    except ValueError:
+        return [math.nan]  # inf + -inf, which sum() also turns into nan
+    while total != 0.0:
+        partials.append(total)
+        if not math.isfinite(total):
+            break
+        # fsum of the chunk minus what we already have is the leftover error
+        total = math.fsum(_chain_negated(values, partials))
+    return partials
+
+def _chain_negated(values, partials):
+    yield from values
+    for partial in partials:
+        yield -partial
+
+class ExactMean:
+    """Constant-memory accumulator for an exactly rounded mean.
+
+    Attributes:
+        count (int): Number of values added
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._partials = []
+
+    def add_chunk(self, chunk):
+        """Add a chunk (list, array or memoryview) of floats."""
+        self.count += len(chunk)
+        self._partials.extend(exact_partials(chunk))
+        # Keep the partial list short by re-compressing it now and then
+        if len(self._partials) > 64:
+            self._partials = exact_partials(self._partials)
+        return self
+
+    def merge(self, other):
+        """Fold in another accumulator, e.g. from another process."""
+        self.count += other.count
+        self._partials.extend(other._partials)
+        return self
+
+    def state(self):
+        """Return picklable state: (count, partials)."""
+        return self.count, list(self._partials)
+
+    @classmethod
+    def from_state(cls, state):
+        accumulator = cls()
+        accumulator.count, accumulator._partials = state[0], list(state[1])
+        return accumulator
+
+    @property
+    def total(self):
+        """The correctly rounded sum of every value added."""
+        return math.fsum(self._partials)
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+# ----------------------------------------------------------------------------
+# 2. Data Sources
+# ----------------------------------------------------------------------------
+
+def chunks_from_iterable(iterable, chunk_size=65_536):
+    """Yield lists of up to chunk_size items from any iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def chunks_from_text_file(path, chunk_size=65_536):
+    """Yield lists of floats from a text file with one number per line."""
+    with open(path, encoding="utf-8") as file:
+        numbers = (float(line) for line in file if line.strip())
+        yield from chunks_from_iterable(numbers, chunk_size)
+
+def chunks_from_binary_file(path, chunk_size=1 << 20, start=0, stop=None):
+    """Yield zero-copy float64 views of a binary file via mmap.
+
+    Args:
+        path (str): File written with array('d').tofile()
+        chunk_size (int, optional): Floats per chunk
+        start (int, optional): First float index to read
+        stop (int, optional): Index to stop at (default: end of file)
+
+    Yields:
+        memoryview: The next chunk (valid until the generator moves on)
+    """
+    with open(path, "rb") as file:
+        if file.seek(0, 2) == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped).cast("d")
+            try:
+                stop = len(view) if stop is None else min(stop, len(view))
+                for offset in range(start, stop, chunk_size):
+                    chunk = view[offset:min(offset + chunk_size, stop)]
+                    try:
+                        yield chunk
+                    finally:
+                        chunk.release()
+            finally:
+                view.release()
+
+# ----------------------------------------------------------------------------
+# 3. complex_algorithm in Every Mode
+# ----------------------------------------------------------------------------
+
+def complex_algorithm_streaming(chunks):
+    """Constant-memory complex_algorithm over an iterable of chunks.
+
+    Args:
+        chunks (iterable): Chunks from chunks_from_iterable,
+            chunks_from_text_file or chunks_from_binary_file
+
+    Returns:
+        float: Bit-identical to complex_algorithm in
+            05_documentation_and_best_practices.py on the concatenated data
+    """
+    lengths = []
+
+    def counted():
+        for chunk in chunks:
+            lengths.append(len(chunk))
+            yield chunk
+
+    # One sum() over the doubled values of every chunk, in order, exactly
+    # like sum([x * 2 for x in data]) but without building the list
+    total = sum(map(mul, chain.from_iterable(counted()), repeat(2)))
+    intermediate = total / sum(lengths)
+    return intermediate ** 2
+
+def _finish(accumulator):
+    """Apply the formula of complex_algorithm to the accumulated data."""
+    if accumulator.count == 0:
+        raise ZeroDivisionError("complex_algorithm needs at least one value")
+    # Doubling is exact in binary floating point, so 2 * round(S) equals
+    # round(2 * S): the total of the doubled data, as the original computes
+    intermediate = 2 * accumulator.total / accumulator.count
+    return intermediate ** 2
+
+def complex_algorithm_exact(data):
+    """complex_algorithm with an exactly rounded sum, for any iterable."""
+    return _finish(ExactMean().add_chunk(list(data)))
+
+def complex_algorithm_exact_streaming(chunks):
+    """Constant-memory complex_algorithm_exact over an iterable of chunks."""
+    accumulator = ExactMean()
+    for chunk in chunks:
+        accumulator.add_chunk(chunk)
+    return _finish(accumulator)
+
+def _accumulate_range(job):
+    """Worker function: exact state for one slice of a binary file."""
+    path, start, stop = job
+    accumulator = ExactMean()
+    for chunk in chunks_from_binary_file(path, start=start, stop=stop):
+        accumulator.add_chunk(chunk)
+    return accumulator.state()
+
+def complex_algorithm_parallel(path, processes=4):
+    """Split a binary float64 file across processes and merge the results.
+
+    Args:
+        path (str): File written with array('d').tofile()
+        processes (int, optional): Number of worker processes
+
+    Returns:
+        float: Same value as complex_algorithm_exact on the file's contents
+    """
+    import os
+    from multiprocessing import Pool
+
+    count = os.path.getsize(path) // 8
+    step = max(1, -(-count // processes))
+    jobs = [(path, start, min(start + step, count)) for start in range(0, count, step)]
+    accumulator = ExactMean()
+    with Pool(processes) as pool:
+        for state in pool.map(_accumulate_range, jobs):
+            accumulator.merge(ExactMean.from_state(state))
+    return _finish(accumulator)
+
+# ----------------------------------------------------------------------------
+# 4. Demonstration
+# ----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import contextlib
+    import importlib.util
+    import io
+    import os
+    import random
+    import tempfile
+
+    # The lesson's own complex_algorithm is the reference
+    spec = importlib.util.spec_from_file_location(
+        "lesson", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               "05_documentation_and_best_practices.py"))
+    lesson = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(lesson)
+
+    data = [random.uniform(-1e6, 1e6) * 10 ** random.randint(-8, 8)
+            for _ in range(500_000)]
+
+    reference = lesson.complex_algorithm(data)
+    print(f"In memory (05):   {reference!r}")
+
+    streamed = complex_algorithm_streaming(chunks_from_iterable(iter(data), 10_000))
+    print(f"Streamed:         {streamed!r}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "data.bin")
+        with open(path, "wb") as file:
+            array("d", data).tofile(file)
+
+        mapped = complex_algorithm_streaming(chunks_from_binary_file(path, 77_777))
+        print(f"Memory-mapped:    {mapped!r}")
+        print(f"Bit-identical to the original: {reference == streamed == mapped}")
+
+        exact = complex_algorithm_exact(data)
+        print(f"\nExact mode:       {exact!r}")
+        chunked = complex_algorithm_exact_streaming(chunks_from_binary_file(path, 77_777))
+        parallel = complex_algorithm_parallel(path, processes=3)
+        print(f"3 processes:      {parallel!r}")
+        print(f"Exact mode bit-identical across modes: {exact == chunked == parallel}")
+
+    shuffled = data[:]
+    random.shuffle(shuffled)
+    print(f"Exact mode order independent: {complex_algorithm_exact(shuffled) == exact}")
+    big = [2**60 + 1, 3]
+    print(f"Big ints kept exact by streaming: "
+          f"{complex_algorithm_streaming([big]) == lesson.complex_algorithm(big)}")
+
+# ----------------------------------------------------------------------------
+# SUMMARY:
+# - A mean only needs a total and a count, not a copy of the data
+# - Generators, chunked readers and mmap keep memory use constant
+# - One ordered sum() over every chunk reproduces the original bit for bit
+# - Float addition is not associative, so splitting a sum can change the last bits
+# - Exact partial sums (via math.fsum) merge without any rounding error
+# - With exact sums, serial, chunked and parallel results are bit-identical
+# ============================================================================